@@ -1,7 +1,8 @@
 import unittest
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-from ..typecheck.args import parse_function
+from ..typecheck.args import ParsedFunction, parse_function
+from ..typecheck.defs import ValidationError
 from ..utils.types import guard_never
 from .env import BuiltComponentConfig, BuiltComponentSink, ComponentBuildEnv
 from .fnexec import (
@@ -9,8 +10,11 @@ from .fnexec import (
     fn_kwargs_from_py,
     fn_kwargs_from_yaml,
     fn_kwargs_into_yaml,
+    fn_kwargs_many_into_yaml,
 )
 from .nodes import Args, CallableNode
+from .profile import phase_timer
+from .registry import LazyParse, register_node, registered_nodes
 
 
 class _FunctionalComponent(CallableNode[Args]):
@@ -32,7 +36,19 @@ class _FunctionalComponent(CallableNode[Args]):
         self.is_deterministic = is_deterministic
         self.tags = tags
 
-        self.parsed_fn = parse_function(fn)
+        self._parsed_fn: Optional[ParsedFunction] = None
+        if not LazyParse.get():
+            self.parsed_fn  # report invalid signatures right away
+        register_node(self)
+
+    @property
+    def parsed_fn(self) -> ParsedFunction:
+        """Parsed at decoration, or on first use under `LazyParse`, so that
+        importing many components only pays for the ones that are actually used."""
+
+        if self._parsed_fn is None:
+            self._parsed_fn = parse_function(self.fn)
+        return self._parsed_fn
 
     def __call__(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
         env = ComponentBuildEnv.get()
@@ -44,15 +60,29 @@ class _FunctionalComponent(CallableNode[Args]):
             guard_never(env)
 
     def _build(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
-        values = fn_kwargs_from_py(
-            name=self.name, parsed_fn=self.parsed_fn, args=args, kwargs=kwargs
+        timed = phase_timer(self.name)
+        values = timed(
+            "validate",
+            fn_kwargs_from_py,
+            name=self.name,
+            parsed_fn=self.parsed_fn,
+            args=args,
+            kwargs=kwargs,
+            copy_default=lambda fn, v: timed("defaults", fn, v),
         )
-        raw_values = fn_kwargs_into_yaml(parsed_fn=self.parsed_fn, kwargs=values)
-        BuiltComponentSink.put(
-            BuiltComponentConfig(component=self, raw_kwargs=raw_values, children=[])
+        raw_values = timed(
+            "serialize", fn_kwargs_into_yaml, parsed_fn=self.parsed_fn, kwargs=values
         )
+        built = BuiltComponentConfig(component=self, raw_kwargs=raw_values, children=[])
+        timed("sink", BuiltComponentSink.put, built)
         return
 
+    def bind_many(self, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate the keyword arguments of many calls, e.g. a parameter sweep,
+        into AML-ish kwargs. Raises `BindManyError` with every invalid row."""
+
+        return fn_kwargs_many_into_yaml(self.name, self.parsed_fn, rows)
+
     def _run_py(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
         values = fn_kwargs_from_py(
             name=self.name, parsed_fn=self.parsed_fn, args=args, kwargs=kwargs
@@ -92,6 +122,28 @@ def component(
     return _decorate
 
 
+def validate_all() -> int:
+    """Parse the signatures of all components and pipelines defined so far,
+    which under `LazyParse` otherwise happens on their first use. Meant for CI,
+    it raises one `ValidationError` for every invalid signature and returns how
+    many nodes were checked."""
+
+    nodes = registered_nodes()
+    errs: List[str] = []
+    for node in nodes:
+        try:
+            node.parsed_fn
+        except (ValidationError, ValueError) as err:
+            errs.append(f"{node.name}: {err}")
+    if errs:
+        log = f"{len(errs)} of {len(nodes)} components have invalid signatures:"
+        for err in errs:
+            for line in err.split("\n"):
+                log += f"\n  {line}"
+        raise ValidationError(log)
+    return len(nodes)
+
+
 class ComponentTest(unittest.TestCase):
     def test_component_run(self):
         output: List[str] = []
@@ -106,6 +158,86 @@ class ComponentTest(unittest.TestCase):
         foo._run_cli(["--x_num", "4"])
         self.assertEqual(output, ["1 ['2']", "3 ['default']", "4 ['DEFAULT', 'MORE']"])
 
+    def test_component_cli_files(self):
+        import os
+        import tempfile
+
+        output: List[str] = []
+
+        @component(name="amari.comps.test.cli")
+        def cli(
+            x_num: int, y_s: List[str] = [], z_b: bytes = b"", w_s: str = ""
+        ) -> None:
+            output.append(f"{x_num} {y_s} {z_b!r} {w_s}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            payload = os.path.join(tmp, "payload.json")
+            with open(payload, "w") as f:
+                f.write('["a", "b"]')
+            blob = os.path.join(tmp, "blob.b64")
+            with open(blob, "w") as f:
+                f.write("3q2+7w==")
+            argsfile = os.path.join(tmp, "args.txt")
+            with open(argsfile, "w") as f:
+                f.write(f"--x_num\n2\n\n--z_b=@{blob}\n\n")
+            empty = os.path.join(tmp, "empty.txt")
+            open(empty, "w").close()
+
+            cli._run_cli(["--x_num=1", f"--y_s=@{payload}"])
+            cli._run_cli([f"@{argsfile}", "--y_s", '["@@"]'])
+            cli._run_cli(["--x_num=3", '--y_s=["@@c"]', f"@{empty}"])
+            cli._run_cli(["--x_num=4", "--w_s=@@d=e"])
+            cli._run_cli(["--x_num", "5", "--w_s", "@alice"])
+            cli._run_cli([f"@{argsfile}", "--w_s", "@@bob"])
+            # pipes cannot be memory mapped
+            read_fd, write_fd = os.pipe()
+            with os.fdopen(write_fd, "w") as f:
+                f.write("piped")
+            try:
+                cli._run_cli(["--x_num=6", f"--w_s=@/dev/fd/{read_fd}"])
+            finally:
+                os.close(read_fd)
+            with self.assertRaises(FileNotFoundError):
+                cli._run_cli([f"--y_s=@{tmp}/missing.json"])
+        self.assertEqual(
+            output,
+            [
+                "1 ['a', 'b'] b'' ",
+                "2 ['@@'] b'\\xde\\xad\\xbe\\xef' ",
+                "3 ['@@c'] b'' ",
+                "4 [] b'' @d=e",
+                "5 [] b'' @alice",
+                "2 [] b'\\xde\\xad\\xbe\\xef' @@bob",
+                "6 [] b'' piped",
+            ],
+        )
+
+    def test_component_eager_parse(self):
+        with self.assertRaisesRegex(ValidationError, "Function `bad`"):
+
+            @component(name="amari.comps.test.eager.bad")
+            def bad(apple: Optional[str]) -> None:
+                pass
+
+    def test_component_lazy_parse(self):
+        LazyParse.set()
+
+        @component(name="amari.comps.test.lazy.bad")
+        def bad(apple: Optional[str]) -> None:
+            pass
+
+        @component(name="amari.comps.test.lazy.good")
+        def good(x_num: int) -> None:
+            pass
+
+        self.assertIsNone(good._parsed_fn)
+        with self.assertRaisesRegex(ValidationError, "1 of .* components") as ctx:
+            validate_all()
+        self.assertIn("amari.comps.test.lazy.bad: Function `bad`", str(ctx.exception))
+        self.assertIsNotNone(good._parsed_fn)
+        with self.assertRaises(ValidationError):
+            bad._run_py("a")
+
     def test_component_sink(self):
         sink = BuiltComponentSink.create()
 
@@ -123,4 +255,54 @@ class ComponentTest(unittest.TestCase):
         self.assertEqual(built[1].raw_kwargs, {"x_num": 3, "y_s": '["default"]'})
         self.assertEqual(built[2].raw_kwargs, {"x_num": 4, "y_s": '["DEFAULT"]'})
 
+    def test_component_bind_many(self):
+        from ..typecheck.defs import Field
+        from .fnexec import BindManyError
+
+        @component(name="amari.comps.test.sweep")
+        def sweep(
+            x_num: int,
+            y_rate: float = Field(0.5, min=0.0, max=1.0),
+            z_s: List[str] = ["default"],
+        ) -> None:
+            _ = x_num, y_rate, z_s
+
+        rows = [{"x_num": i, "y_rate": i / 10} for i in range(10)]
+        rows[3]["z_s"] = ["a"]
+        raw_rows = sweep.bind_many(rows)
+        self.assertEqual(len(raw_rows), 10)
+        self.assertEqual(raw_rows[0], {"x_num": 0, "y_rate": 0.0, "z_s": '["default"]'})
+        self.assertEqual(raw_rows[3], {"x_num": 3, "y_rate": 0.3, "z_s": '["a"]'})
+        # same result as one call at a time
+        sink = BuiltComponentSink.create()
+        for row in rows:
+            sweep._build(**row)
+        self.assertEqual([b.raw_kwargs for b in sink.dump()], raw_rows)
+
+        rows[2]["y_rate"] = 1.5
+        rows[7]["y_rate"] = -1.0
+        del rows[5]["x_num"]
+        rows[8]["w_num"] = 1
+        with self.assertRaises(BindManyError) as ctx:
+            sweep.bind_many(rows)
+        self.assertEqual(
+            ctx.exception.violations,
+            [
+                (2, "y_rate", "assert 0.0 <= x <= 1.0"),
+                (5, "x_num", "missing"),
+                (7, "y_rate", "assert 0.0 <= x <= 1.0"),
+                (8, "w_num", "unknown field"),
+            ],
+        )
+
+        # nan is out of any bounds, wherever it is in the column
+        rows = [{"x_num": 0, "y_rate": float("nan")}, {"x_num": 1, "y_rate": 0.5}]
+        with self.assertRaises(BindManyError) as ctx:
+            sweep.bind_many(rows)
+        self.assertEqual(
+            ctx.exception.violations, [(0, "y_rate", "assert 0.0 <= x <= 1.0")]
+        )
+        with self.assertRaises(ValueError):
+            sweep._build(**rows[0])
+
     pass
@@ -0,0 +1,268 @@
+import collections
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import unittest
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from ..utils.pyctx import PyCtx
+from .env import BuiltComponentConfig
+from .registry import nodes_named
+
+if TYPE_CHECKING:
+    from ..comps import _FunctionalComponent
+    from ..pipel import _FunctionalPipeline
+
+    BuildNode = Union[_FunctionalComponent[Any], _FunctionalPipeline[Any]]
+
+
+_CACHE_FORMAT = 1
+
+_NodeFingerprints: "weakref.WeakKeyDictionary[BuildNode, str]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def node_fingerprint(node: "BuildNode") -> str:
+    """Hash of everything about a component that affects what it builds into:
+    name, version, function source and the parsed field schema."""
+
+    if node in _NodeFingerprints:
+        return _NodeFingerprints[node]
+    try:
+        source = inspect.getsource(node.fn)
+    except (OSError, TypeError):
+        code = node.fn.__code__
+        source = code.co_code.hex() + repr(code.co_consts)
+    schema = [
+        [
+            field.name,
+            repr(field.py_type),
+            field.draft.aml_type,
+            field.aml_optional,
+            field.aml_default,
+            field.draft.aml_min,
+            field.draft.aml_max,
+        ]
+        for field in node.parsed_fn.fields
+    ]
+    blob = json.dumps(
+        [type(node).__name__, node.name, node.version, source, schema],
+        default=repr,
+    )
+    fingerprint = hashlib.sha256(blob.encode()).hexdigest()
+    _NodeFingerprints[node] = fingerprint
+    return fingerprint
+
+
+def _resolve_node(name: str, fingerprint: str) -> Optional["BuildNode"]:
+    for node in nodes_named(name):
+        if node_fingerprint(node) == fingerprint:
+            return node
+    return None
+
+
+class BuildCache:
+    """Opt-in on-disk cache of built pipeline subtrees. Entries are keyed by the
+    pipeline fingerprint and its validated kwargs, and are only reused if every
+    component in the subtree still has the fingerprint it was built with.
+    Non-deterministic pipelines, and pipelines built around them, are never
+    cached. The least recently used entries are evicted beyond `max_bytes`."""
+
+    _BuildCacheCtx: PyCtx["BuildCache"] = PyCtx(key="amari.comps.BuildCache")
+
+    def __init__(self, path: pathlib.Path, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.path.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        self._sizes: collections.OrderedDict[str, int] = collections.OrderedDict(
+            (p.stem, p.stat().st_size) for p in files
+        )
+        self._total_bytes = sum(self._sizes.values())
+
+    @staticmethod
+    def create(path: pathlib.Path, max_bytes: int = 64 * 1024 * 1024) -> "BuildCache":
+        """Enable the cache for pipeline builds made by the caller."""
+
+        self = BuildCache(path, max_bytes=max_bytes)
+        BuildCache._BuildCacheCtx.append(self, offset=1)
+        return self
+
+    @staticmethod
+    def current() -> Optional["BuildCache"]:
+        top = BuildCache._BuildCacheCtx.get()
+        return top[-1] if top else None
+
+    def key(self, node: "BuildNode", raw_kwargs: Dict[str, Any]) -> str:
+        blob = json.dumps(
+            [node_fingerprint(node), raw_kwargs], sort_keys=True, default=repr
+        )
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[BuiltComponentConfig]:
+        entry: Optional[Dict[str, Any]] = None
+        if key in self._sizes:
+            try:
+                entry = json.loads((self.path / f"{key}.json").read_text())
+            except (OSError, ValueError):
+                entry = None
+        built = None
+        if entry is not None and entry.get("format") == _CACHE_FORMAT:
+            built = self._from_json(entry["tree"])
+        if entry is None or built is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += entry["elapsed"]
+        self._sizes.move_to_end(key)
+        os.utime(self.path / f"{key}.json")
+        return built
+
+    def store(self, key: str, built: BuiltComponentConfig, elapsed: float) -> None:
+        entry = {"format": _CACHE_FORMAT, "elapsed": elapsed}
+        try:
+            entry["tree"] = self._into_json(built)
+            data = json.dumps(entry, separators=(",", ":")).encode()
+        except (TypeError, ValueError):
+            return  # not representable, just don't cache it
+        if len(data) > self.max_bytes:
+            return
+        tmp = self.path / f"{key}.json.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.path / f"{key}.json")
+        self._total_bytes += len(data) - self._sizes.pop(key, 0)
+        self._sizes[key] = len(data)
+        while self._total_bytes > self.max_bytes:
+            old_key, old_size = self._sizes.popitem(last=False)
+            self._total_bytes -= old_size
+            (self.path / f"{old_key}.json").unlink(missing_ok=True)
+        return
+
+    def _into_json(self, built: BuiltComponentConfig) -> Dict[str, Any]:
+        return {
+            "name": built.component.name,
+            "fingerprint": node_fingerprint(built.component),
+            "raw_kwargs": built.raw_kwargs,
+            "children": [self._into_json(child) for child in built.children],
+        }
+
+    def _from_json(self, tree: Dict[str, Any]) -> Optional[BuiltComponentConfig]:
+        node = _resolve_node(tree["name"], tree["fingerprint"])
+        if node is None:
+            return None
+        children: List[BuiltComponentConfig] = []
+        for child_tree in tree["children"]:
+            child = self._from_json(child_tree)
+            if child is None:
+                return None
+            children.append(child)
+        return BuiltComponentConfig(
+            component=node, raw_kwargs=tree["raw_kwargs"], children=children
+        )
+
+    pass
+
+
+class BuildCacheTests(unittest.TestCase):
+    def test_build_cache(self):
+        import tempfile
+
+        from ..comps import component
+        from ..pipel import pipeline
+        from .env import BuiltComponentSink
+
+        calls: List[int] = []
+
+        @component(name="amari.comps.test.cache.foo")
+        def foo(x_num: int, y_s: List[str] = ["a"]) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.comps.test.cache.main")
+        def ppl_main(x_num: int) -> None:
+            calls.append(x_num)
+            foo(x_num, y_s=["b"])
+            foo(x_num + 1)
+
+        def build(cache_dir: pathlib.Path, x_num: int, max_bytes: int = 1 << 20):
+            cache = BuildCache.create(cache_dir, max_bytes=max_bytes)
+            sink = BuiltComponentSink.create()
+            ppl_main._build(x_num)
+            return cache, sink.dump()[0]
+
+        def shape(built: BuiltComponentConfig) -> Any:
+            children = [shape(c) for c in built.children]
+            return (built.component, built.raw_kwargs, children)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = pathlib.Path(tmp)
+            cache, first = build(cache_dir, 1)
+            self.assertEqual((cache.hits, cache.misses, calls), (0, 1, [1]))
+            # a fresh cache on the same directory, as in the next release
+            cache, second = build(cache_dir, 1)
+            self.assertEqual((cache.hits, cache.misses, calls), (1, 0, [1]))
+            self.assertEqual(shape(first), shape(second))
+            self.assertGreaterEqual(cache.saved_seconds, 0.0)
+            cache, _ = build(cache_dir, 2)
+            self.assertEqual((cache.hits, cache.misses, calls), (0, 1, [1, 2]))
+
+            # a changed sub-component invalidates the entry
+            foo.version = "0.0.2"
+            _NodeFingerprints.pop(foo)
+            cache, _ = build(cache_dir, 1)
+            self.assertEqual((cache.hits, cache.misses, calls), (0, 1, [1, 2, 1]))
+
+            # eviction keeps the directory bounded
+            entry_size = max(p.stat().st_size for p in cache_dir.glob("*.json"))
+            for i in range(10, 20):
+                cache, _ = build(cache_dir, i, max_bytes=entry_size * 3)
+            self.assertLessEqual(len(list(cache_dir.glob("*.json"))), 3)
+            cache, _ = build(cache_dir, 19, max_bytes=entry_size * 3)
+            self.assertEqual(cache.hits, 1)
+
+    def test_build_cache_nondeterministic(self):
+        import itertools
+        import tempfile
+
+        from ..comps import component
+        from ..pipel import pipeline
+        from .env import BuiltComponentSink
+
+        counter = itertools.count()
+
+        @component(name="amari.comps.test.cache.nd.leaf")
+        def leaf(n: int) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.comps.test.cache.nd.rand", is_deterministic=False)
+        def ppl_rand() -> None:
+            leaf(next(counter))
+
+        @pipeline(name="amari.comps.test.cache.nd.main")
+        def ppl_main() -> None:
+            ppl_rand()
+
+        def leaves(cache_dir: pathlib.Path, ppl: Any) -> List[Any]:
+            cache = BuildCache.create(cache_dir)
+            sink = BuiltComponentSink.create()
+            ppl._build()
+            self.assertEqual(cache.hits, 0)
+            (built,) = sink.dump()
+            while built.children:
+                (built,) = built.children
+            return built.raw_kwargs["n"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = pathlib.Path(tmp)
+            self.assertEqual([leaves(cache_dir, ppl_rand) for _ in range(3)], [0, 1, 2])
+            self.assertEqual([leaves(cache_dir, ppl_main) for _ in range(3)], [3, 4, 5])
+            self.assertEqual(list(cache_dir.glob("*.json")), [])
+
+    pass
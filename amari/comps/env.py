@@ -1,6 +1,23 @@
 import dataclasses
 import enum
-from typing import TYPE_CHECKING, Any, Dict, List, Union
+import json
+import sys
+import unittest
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+    overload,
+)
 
 from ..utils.pyctx import PyCtx
 
@@ -35,7 +52,93 @@ _BuildEnvCtx: PyCtx["ComponentBuildEnv"] = PyCtx(
 )
 
 
-@dataclasses.dataclass
+class LazyBuild:
+    """Builds sub-pipelines lazily: pipelines nested deeper than the given depth
+    get `LazyChildren` that only run the pipeline body on first access, one
+    level at a time. Depth 0 only builds the top-level node itself."""
+
+    _LazyBuildCtx: PyCtx[int] = PyCtx(key="amari.comps.LazyBuild")
+
+    @staticmethod
+    def set(depth: int) -> None:
+        LazyBuild._LazyBuildCtx.append(depth, offset=1)
+
+    @staticmethod
+    def get() -> Optional[int]:
+        """Remaining depth to expand eagerly, or None when building eagerly."""
+
+        top = LazyBuild._LazyBuildCtx.get()
+        if not top:
+            return None
+        # streamed configs must be complete when they are emitted
+        sinks = BuiltComponentSink._ComponentSinkCtx.get()
+        if sinks and sinks[-1].is_streaming:
+            return None
+        return top[-1]
+
+    pass
+
+
+class LazyChildren(Sequence["BuiltComponentConfig"]):
+    """Children of a lazily built pipeline, built on first access."""
+
+    __slots__ = ("_thunk", "_children")
+
+    def __init__(self, thunk: Callable[[], List["BuiltComponentConfig"]]):
+        self._thunk: Optional[Callable[[], List[BuiltComponentConfig]]] = thunk
+        self._children: Optional[List[BuiltComponentConfig]] = None
+
+    @property
+    def expanded(self) -> bool:
+        return self._children is not None
+
+    def expand(self) -> List["BuiltComponentConfig"]:
+        if self._children is None:
+            assert self._thunk is not None
+            self._children, self._thunk = self._thunk(), None
+        return self._children
+
+    @overload
+    def __getitem__(self, index: int) -> "BuiltComponentConfig": ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List["BuiltComponentConfig"]: ...
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.expand()[index]
+
+    def __len__(self) -> int:
+        return len(self.expand())
+
+    def __iter__(self) -> Iterator["BuiltComponentConfig"]:
+        return iter(self.expand())
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return self.expand() == list(other)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        if self._children is None:
+            return "LazyChildren(...)"
+        return f"LazyChildren({self._children!r})"
+
+    pass
+
+
+def expand_lazy(config: "BuiltComponentConfig", depth: Optional[int] = None) -> None:
+    """Expand lazily built children down to `depth` levels (all if None)."""
+
+    level: List[BuiltComponentConfig] = [config]
+    while level and (depth is None or depth > 0):
+        level = [child for node in level for child in node.children]
+        depth = None if depth is None else depth - 1
+    return
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class BuiltComponentConfig:
     # since the kwargs would be remembered & scheduled by a pipeline, here
     # we record everything in yaml and no positional args are kept
@@ -43,11 +146,36 @@ class BuiltComponentConfig:
     # this must be in yaml format to be usable by shrike
     raw_kwargs: Dict[str, Any]
 
-    # specific to pipelines: we have children
-    children: List["BuiltComponentConfig"]
+    # specific to pipelines: we have children (`LazyChildren` if built lazily)
+    children: Sequence["BuiltComponentConfig"]
+
+    def summarize(self) -> "BuiltComponentSummary":
+        return BuiltComponentSummary(
+            name=self.component.name,
+            version=self.component.version,
+            raw_kwargs=dict(self.raw_kwargs),
+            children=[child.summarize() for child in self.children],
+        )
+
+    pass
+
+
+@dataclasses.dataclass
+class BuiltComponentSummary:
+    """Picklable view of a `BuiltComponentConfig` tree that does not reference
+    the component objects, so it can be sent across processes."""
+
+    name: str
+    version: str
+    raw_kwargs: Dict[str, Any]
+    children: List["BuiltComponentSummary"]
     pass
 
 
+BuiltComponentConsumer = Callable[[Tuple[int, ...], BuiltComponentConfig], None]
+"""Receives each streamed config with its path (child indices from the root)."""
+
+
 class BuiltComponentSink:
     """Stores compiled component & pipeline components' configs here for
     collecting and consumption."""
@@ -56,12 +184,38 @@ class BuiltComponentSink:
         key="amari.comps.BuiltComponentSink"
     )
 
-    def __init__(self):
+    def __init__(
+        self,
+        consumer: Optional[BuiltComponentConsumer] = None,
+        path: Tuple[int, ...] = (),
+    ):
         self._sink: List[BuiltComponentConfig] = []
+        self._consumer = consumer
+        self._path = path
+        self._count = 0
 
     @staticmethod
     def create() -> "BuiltComponentSink":
-        self = BuiltComponentSink()
+        # sinks nested in a streaming sink (i.e. pipeline children) stream too
+        parent = BuiltComponentSink._ComponentSinkCtx.get(offset=1)
+        if parent and parent[-1]._consumer is not None:
+            self = BuiltComponentSink(
+                consumer=parent[-1]._consumer,
+                path=parent[-1]._path + (parent[-1]._count,),
+            )
+        else:
+            self = BuiltComponentSink()
+        BuiltComponentSink._ComponentSinkCtx.append(self, offset=1)
+        return self
+
+    @staticmethod
+    def create_streaming(consumer: BuiltComponentConsumer) -> "BuiltComponentSink":
+        """Push every config to `consumer` as soon as its subtree completes,
+        instead of collecting them. Configs arrive in post-order with empty
+        `children`, since the children were already streamed under longer
+        paths; memory is then bounded by the depth of the pipeline."""
+
+        self = BuiltComponentSink(consumer=consumer)
         BuiltComponentSink._ComponentSinkCtx.append(self, offset=1)
         return self
 
@@ -70,10 +224,381 @@ class BuiltComponentSink:
         self = BuiltComponentSink._ComponentSinkCtx.get()
         if not self:
             raise ValueError("cannot put BuiltComponentConfig here: not in build mode")
-        self[-1]._sink.append(config)
+        interner = BuiltComponentInterner.current()
+        if interner is not None:
+            config = interner.intern(config)
+        self[-1]._put(config)
+        return
+
+    def _put(self, config: BuiltComponentConfig) -> None:
+        if self._consumer is None:
+            self._sink.append(config)
+        else:
+            self._stream(self._path + (self._count,), config)
+        self._count += 1
+        return
+
+    def _stream(self, path: Tuple[int, ...], config: BuiltComponentConfig) -> None:
+        # configs restored whole (e.g. from a cache) still arrive in post-order
+        assert self._consumer is not None
+        if config.children:
+            for i, child in enumerate(config.children):
+                self._stream(path + (i,), child)
+            config = dataclasses.replace(config, children=[])
+        self._consumer(path, config)
         return
 
+    @property
+    def is_streaming(self) -> bool:
+        return self._consumer is not None
+
     def dump(self) -> List[BuiltComponentConfig]:
+        """Configs collected so far. Always empty for streaming sinks."""
+
         return list(self._sink)
 
     pass
+
+
+def jsonl_consumer(fp: TextIO) -> BuiltComponentConsumer:
+    """Streaming consumer that writes one JSON line per built config."""
+
+    def _consume(path: Tuple[int, ...], config: BuiltComponentConfig) -> None:
+        record = {
+            "path": list(path),
+            "name": config.component.name,
+            "version": config.component.version,
+            "raw_kwargs": config.raw_kwargs,
+        }
+        fp.write(json.dumps(record) + "\n")
+        return
+
+    return _consume
+
+
+class BuildMemo:
+    """Remembers the children captured by each (pipeline, yaml kwargs) call so
+    that repeated calls within a build reuse the subtree instead of running the
+    pipeline body again. Reused children are shared and must be treated as
+    read-only. Pipelines with a non-deterministic sub-pipeline anywhere in
+    their subtree are never reused."""
+
+    _BuildMemoCtx: PyCtx["BuildMemo"] = PyCtx(key="amari.comps.BuildMemo")
+    _ScopeCtx: PyCtx["_BuildMemoScope"] = PyCtx(key="amari.comps.BuildMemoScope")
+
+    def __init__(self):
+        self._memo: Dict[Tuple[Any, ...], List[BuiltComponentConfig]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def create() -> "BuildMemo":
+        """Memoize pipeline calls in builds made by the caller. Builds are not
+        memoized unless a memo was created."""
+
+        self = BuildMemo()
+        BuildMemo._BuildMemoCtx.append(self, offset=1)
+        return self
+
+    @staticmethod
+    def current() -> Optional["BuildMemo"]:
+        top = BuildMemo._BuildMemoCtx.get()
+        return top[-1] if top else None
+
+    @staticmethod
+    def enter() -> "_BuildMemoScope":
+        """Track the subtree built by the caller, which may only be memoized or
+        cached if it is still deterministic once built."""
+
+        scope = _BuildMemoScope()
+        BuildMemo._ScopeCtx.append(scope, offset=1)
+        return scope
+
+    @staticmethod
+    def taint() -> None:
+        """Mark every pipeline being built around the caller as
+        non-deterministic."""
+
+        for scope in BuildMemo._ScopeCtx.get():
+            scope.deterministic = False
+        return
+
+    @staticmethod
+    def key(
+        component: Union["_FunctionalComponent", "_FunctionalPipeline"],
+        raw_kwargs: Dict[str, Any],
+    ) -> Optional[Tuple[Any, ...]]:
+        try:
+            # `1 == 1.0 == True`, so values are told apart by type
+            key = (component, tuple((k, type(v), v) for k, v in raw_kwargs.items()))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def load(self, key: Tuple[Any, ...]) -> Optional[List[BuiltComponentConfig]]:
+        children = self._memo.get(key)
+        if children is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return children
+
+    def store(self, key: Tuple[Any, ...], children: List[BuiltComponentConfig]) -> None:
+        self._memo[key] = children
+        return
+
+    pass
+
+
+@dataclasses.dataclass(slots=True)
+class _BuildMemoScope:
+    deterministic: bool = True
+    pass
+
+
+class BuiltComponentInterner:
+    """Hash-conses identical `(component, raw_kwargs, children)` subtrees so that
+    repeated calls with the same arguments share one config node. Interned
+    configs are shared between parents and must be treated as read-only."""
+
+    _InternerCtx: PyCtx["BuiltComponentInterner"] = PyCtx(
+        key="amari.comps.BuiltComponentInterner"
+    )
+
+    def __init__(self):
+        self._table: Dict[Tuple[Any, ...], BuiltComponentConfig] = {}
+        self._canonical: Set[int] = set()
+        self.nodes_seen = 0
+        self.nodes_shared = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def create() -> "BuiltComponentInterner":
+        """Intern every config built by the caller from now on."""
+
+        self = BuiltComponentInterner()
+        BuiltComponentInterner._InternerCtx.append(self, offset=1)
+        return self
+
+    @staticmethod
+    def current() -> Optional["BuiltComponentInterner"]:
+        top = BuiltComponentInterner._InternerCtx.get()
+        return top[-1] if top else None
+
+    def intern(self, config: BuiltComponentConfig) -> BuiltComponentConfig:
+        if id(config) in self._canonical:
+            return config
+        # interning must not force lazily built children
+        if isinstance(config.children, LazyChildren) and not config.children.expanded:
+            return config
+        children = [self.intern(child) for child in config.children]
+        if any(a is not b for a, b in zip(children, config.children)):
+            config = dataclasses.replace(config, children=children)
+        self.nodes_seen += 1
+        try:
+            key = (
+                id(config.component),
+                # `1 == 1.0 == True`, so values are told apart by type
+                tuple((k, type(v), v) for k, v in config.raw_kwargs.items()),
+                tuple(id(child) for child in children),
+            )
+            shared = self._table.get(key)
+        except TypeError:  # unhashable kwargs are left alone
+            return config
+        if shared is not None:
+            self.nodes_shared += 1
+            self.bytes_saved += _shallow_size(config)
+            return shared
+        self._table[key] = config
+        self._canonical.add(id(config))
+        return config
+
+    pass
+
+
+def _shallow_size(config: BuiltComponentConfig) -> int:
+    size = sys.getsizeof(config)
+    size += sys.getsizeof(config.children) + sys.getsizeof(config.raw_kwargs)
+    size += sum(sys.getsizeof(v) for v in config.raw_kwargs.values())
+    return size
+
+
+class BuiltComponentInternerTests(unittest.TestCase):
+    def test_interning(self):
+        import tracemalloc
+
+        from ..comps import component
+        from ..pipel import pipeline
+
+        @component(name="amari.comps.test.intern.foo")
+        def foo(x_num: int, y_s: List[str] = ["a"]) -> None:
+            pass
+
+        @pipeline(name="amari.comps.test.intern.branch")
+        def ppl_branch(x_num: int) -> None:
+            for i in range(10):
+                foo(i, y_s=["b"] * x_num if i % 2 else ["c"])
+
+        @pipeline(name="amari.comps.test.intern.main")
+        def ppl_main(fan_out: int) -> None:
+            for i in range(fan_out):
+                ppl_branch(i % 3)
+
+        def build(interned: bool) -> Tuple[BuiltComponentConfig, int]:
+            interner = BuiltComponentInterner.create() if interned else None
+            tracemalloc.start()
+            sink = BuiltComponentSink.create()
+            ppl_main._build(200)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertEqual(interner is None, not interned)
+            return sink.dump()[0], peak
+
+        def shape(config: BuiltComponentConfig) -> Any:
+            children = [shape(child) for child in config.children]
+            return (config.component.name, config.raw_kwargs, children)
+
+        plain, plain_peak = build(interned=False)
+        interned, interned_peak = build(interned=True)
+        self.assertEqual(shape(plain), shape(interned))
+        branches = interned.children
+        self.assertIs(branches[0], branches[3])
+        self.assertIsNot(branches[0], branches[1])
+        self.assertIs(branches[1].children[4], branches[2].children[4])
+        self.assertIsNot(plain.children[0], plain.children[3])
+        print(f"peak: {plain_peak} -> {interned_peak} bytes")
+        self.assertLess(interned_peak, plain_peak)
+
+    def test_interner_counters(self):
+        interner = BuiltComponentInterner()
+        component: Any = object()
+        leaves = [
+            BuiltComponentConfig(component=component, raw_kwargs={"x": 1}, children=[])
+            for _ in range(3)
+        ]
+        root = BuiltComponentConfig(component=component, raw_kwargs={}, children=leaves)
+        root = interner.intern(root)
+        self.assertEqual((interner.nodes_seen, interner.nodes_shared), (4, 2))
+        self.assertIs(root.children[0], root.children[2])
+        self.assertGreater(interner.bytes_saved, 0)
+        self.assertIs(interner.intern(root), root)
+        self.assertEqual(interner.nodes_seen, 4)
+
+    def test_interner_kwargs_types(self):
+        interner = BuiltComponentInterner()
+        component: Any = object()
+        leaves = [
+            BuiltComponentConfig(component=component, raw_kwargs={"y": y}, children=[])
+            for y in [2, 2.0, True, 2]
+        ]
+        root = BuiltComponentConfig(component=component, raw_kwargs={}, children=leaves)
+        root = interner.intern(root)
+        types = [type(child.raw_kwargs["y"]) for child in root.children]
+        self.assertEqual(types, [int, float, bool, int])
+        self.assertIs(root.children[0], root.children[3])
+        self.assertEqual(interner.nodes_shared, 1)
+
+    pass
+
+
+class BuiltComponentConfigTests(unittest.TestCase):
+    def test_footprint(self):
+        import tracemalloc
+
+        @dataclasses.dataclass
+        class PlainConfig:
+            component: Any
+            raw_kwargs: Dict[str, Any]
+            children: List[Any]
+            pass
+
+        def measure(cls: Any, nodes: int = 100_000, width: int = 100) -> float:
+            # shared kwargs & leaf lists, so that only the nodes are measured
+            component, raw_kwargs, no_children = object(), {"x_num": 1}, []
+            tracemalloc.start()
+            roots = []
+            for _ in range(nodes // (width + 1)):
+                leaves = [cls(component, raw_kwargs, no_children) for _ in range(width)]
+                roots.append(cls(component, raw_kwargs, leaves))
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            count = len(roots) * (width + 1)
+            # the child lists are the same for both representations
+            size -= sum(sys.getsizeof(root.children) for root in roots)
+            return size / count
+
+        before = measure(PlainConfig)
+        after = measure(BuiltComponentConfig)
+        print(f"bytes per node: {before:.1f} -> {after:.1f}")
+        self.assertLess(after, before * 0.75)
+
+    pass
+
+
+class BuiltComponentSinkTests(unittest.TestCase):
+    def test_streaming_sink(self):
+        import io
+
+        from ..comps import component
+        from ..pipel import pipeline
+
+        @component(name="amari.comps.test.stream.foo")
+        def foo(x_num: int) -> None:
+            pass
+
+        @pipeline(name="amari.comps.test.stream.core")
+        def ppl_core(x_num: int) -> None:
+            foo(x_num)
+            foo(x_num + 1)
+
+        @pipeline(name="amari.comps.test.stream.main")
+        def ppl_main(x_num: int) -> None:
+            foo(x_num)
+            ppl_core(x_num * 10)
+            ppl_core(x_num * 20)
+
+        def build_collected() -> BuiltComponentConfig:
+            sink = BuiltComponentSink.create()
+            ppl_main._build(1)
+            return sink.dump()[0]
+
+        def build_streamed() -> List[Tuple[Tuple[int, ...], BuiltComponentConfig]]:
+            streamed: List[Tuple[Tuple[int, ...], BuiltComponentConfig]] = []
+            sink = BuiltComponentSink.create_streaming(
+                lambda path, config: streamed.append((path, config))
+            )
+            ppl_main._build(1)
+            self.assertEqual(sink.dump(), [])
+            return streamed
+
+        def flatten(
+            config: BuiltComponentConfig, path: Tuple[int, ...]
+        ) -> List[Tuple[Tuple[int, ...], str, Dict[str, Any]]]:
+            ret = []
+            for i, child in enumerate(config.children):
+                ret += flatten(child, path + (i,))
+            ret.append((path, config.component.name, config.raw_kwargs))
+            return ret
+
+        streamed = build_streamed()
+        self.assertTrue(all(not config.children for _, config in streamed))
+        self.assertEqual(
+            [(path, c.component.name, c.raw_kwargs) for path, c in streamed],
+            flatten(build_collected(), (0,)),
+        )
+        self.assertEqual(
+            [path for path, _ in streamed],
+            [(0, 0), (0, 1, 0), (0, 1, 1), (0, 1), (0, 2, 0), (0, 2, 1), (0, 2), (0,)],
+        )
+
+        buf = io.StringIO()
+        BuiltComponentSink.create_streaming(jsonl_consumer(buf))
+        ppl_main._build(2)
+        lines = [json.loads(line) for line in buf.getvalue().splitlines()]
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(lines[1]["path"], [0, 1, 0])
+        self.assertEqual(lines[1]["raw_kwargs"], {"x_num": 20})
+        self.assertEqual(lines[-1]["name"], "amari.comps.test.stream.main")
+
+    pass
@@ -1,7 +1,15 @@
-import copy
-from typing import Any, Dict, List, Tuple
+import collections.abc
+import mmap
+import os
+import stat
+from typing import Any, Callable, Dict, List, Sequence, Set, Tuple
 
-from ..typecheck.args import ParsedFunction
+from ..typecheck.args import DefaultCopier, ParsedFunction
+from ..typecheck.fmt import identity
+
+
+def _copy_default(fn_copy_default: Callable[[Any], Any], value: Any) -> Any:
+    return fn_copy_default(value)
 
 
 def fn_kwargs_from_py(
@@ -9,29 +17,13 @@ def fn_kwargs_from_py(
     parsed_fn: ParsedFunction,
     args: Tuple[Any, ...],
     kwargs: Dict[str, Any],
+    copy_default: DefaultCopier = _copy_default,
 ) -> Dict[str, Any]:
     """Validate positional and keyword arguments from Python function call into
-    a dictionary of kwargs."""
-
-    values: Dict[str, Any] = {}
-    for i, field in enumerate(parsed_fn.fields):
-        if i < len(args):
-            value = args[i]
-        elif field.name in kwargs:
-            value = kwargs[field.name]
-        else:
-            if field.py_default is ...:
-                raise TypeError(
-                    f"{name}() missing required positional argument: '{field.name}'"
-                )
-            value = copy.deepcopy(field.py_default)
-
-        validation_err = field.draft.fn_post_validate(value)
-        if validation_err:
-            raise ValueError(f"invalid value for '{field.name}': {validation_err}")
-        values[field.name] = value
+    a dictionary of kwargs. Defaults of mutable types are copied through
+    `copy_default(field.fn_copy_default, value)`."""
 
-    return values
+    return parsed_fn.bind_py(name, args, kwargs, copy_default)
 
 
 def fn_kwargs_from_yaml(
@@ -40,19 +32,7 @@ def fn_kwargs_from_yaml(
 ) -> Dict[str, Any]:
     """Get Python kwargs from an AML-ish configuration."""
 
-    result: Dict[str, Any] = {}
-    for field in parsed_fn.fields:
-        key = field.name
-        if key in kwargs:
-            value = field.draft.fn_load_yaml(kwargs[key])
-        else:
-            value = copy.deepcopy(field.py_default)
-        validation_err = field.draft.fn_post_validate(value)
-        if validation_err:
-            raise ValueError(f"invalid value for '{key}': {validation_err}")
-        result[key] = value
-
-    return result
+    return parsed_fn.bind_yaml(kwargs)
 
 
 def fn_kwargs_into_yaml(
@@ -61,7 +41,7 @@ def fn_kwargs_into_yaml(
     """Convert Python kwargs into an AML-ish configuration so that they can be
     accepted by Pipeline builders."""
 
-    fields = {field.name: field for field in parsed_fn.fields}
+    fields = parsed_fn.fields_by_name
     result: Dict[str, Any] = {}
     for key, value in kwargs.items():
         if key not in fields:
@@ -72,38 +52,206 @@ def fn_kwargs_into_yaml(
     return result
 
 
+def fn_kwargs_replay_yaml(
+    parsed_fn: ParsedFunction, kwargs: Dict[str, Any], raw_kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Replace one-shot iterators in Python kwargs, which were consumed when
+    they were dumped into `raw_kwargs`, by a replay of the dumped values."""
+
+    fields = parsed_fn.fields_by_name
+    return {
+        key: (
+            fields[key].draft.fn_load_yaml(raw_kwargs[key])
+            if isinstance(value, collections.abc.Iterator)
+            else value
+        )
+        for key, value in kwargs.items()
+    }
+
+
 def fn_kwargs_from_cli(
     parsed_fn: ParsedFunction,
     argv: List[str],
 ) -> Dict[str, Any]:
-    """Validate command-line arguments into a dictionary of kwargs."""
+    """Validate command-line arguments into a dictionary of kwargs. Options are
+    given as `--key value` or `--key=value`, where `--key=@path` reads the value
+    from a file (`--key=@@...` is a literal `@...`); values of the `--key value`
+    form are taken as-is. An `@argsfile` argument in place of an option is
+    replaced by the non-empty lines of that file, one argument per line."""
 
-    fields = {field.name: field for field in parsed_fn.fields}
+    fields = parsed_fn.fields_by_name
+    argv = _expand_argsfiles(argv, set())
     # obtain
     raw_kwargs: Dict[str, str] = {}
-    for i in range(0, len(argv), 2):
+    i = 0
+    while i < len(argv):
         raw_key = argv[i]
         if not raw_key.startswith("--"):
             raise KeyError(f"invalid option '{raw_key}'")
-        if i + 1 >= len(argv):
-            raise ValueError(f"missing value for '{raw_key}'")
-        raw_value = argv[i + 1]
+        if "=" in raw_key:
+            raw_key, raw_value = raw_key.split("=", 1)
+            if raw_value.startswith("@@"):
+                raw_value = raw_value[1:]
+            elif raw_value.startswith("@"):
+                raw_value = _read_mapped(raw_value[1:])
+            i += 1
+        else:
+            if i + 1 >= len(argv):
+                raise ValueError(f"missing value for '{raw_key}'")
+            raw_value = argv[i + 1]
+            i += 2
         key = raw_key[2:]
         if key not in fields:
             raise KeyError(f"unknown option '{raw_key}'")
         raw_kwargs[key] = raw_value
 
     # evaluate & assign
-    kwargs: Dict[str, Any] = {}
+    return parsed_fn.bind_cli(raw_kwargs)
+
+
+def _expand_argsfiles(argv: List[str], seen: Set[str]) -> List[str]:
+    """Expand `@argsfile` arguments in option position. The argument following
+    a `--key` is its value and is kept as-is."""
+
+    result: List[str] = []
+    is_value = False
+
+    def _expand(args: List[str], seen: Set[str]) -> None:
+        nonlocal is_value
+        for arg in args:
+            if is_value or not arg.startswith("@"):
+                is_value = not is_value and arg.startswith("--") and "=" not in arg
+                result.append(arg)
+                continue
+            path = arg[1:]
+            if path in seen:
+                raise ValueError(f"recursive argument file '{path}'")
+            lines = _read_mapped(path).splitlines()
+            _expand([line for line in lines if line], seen | {path})
+        return
+
+    _expand(argv, seen)
+    return result
+
+
+def _read_mapped(path: str) -> str:
+    """Decode a file straight from a memory map, so that large payloads are
+    only copied once into the resulting string. Pipes and other files that
+    cannot be mapped are read as usual."""
+
+    with open(path, "rb") as f:
+        if not stat.S_ISREG(os.fstat(f.fileno()).st_mode):
+            return f.read().decode("utf-8")
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, "utf-8")
+        except ValueError:  # empty files cannot be mapped
+            return ""
+        except OSError:
+            return f.read().decode("utf-8")
+
+
+class BindManyError(ValueError):
+    """All invalid rows of a batch, as `(row index, field, message)`."""
+
+    def __init__(self, name: str, violations: List[Tuple[int, str, str]]):
+        self.violations = violations
+        log = f"{name}() got {len(violations)} invalid argument(s):"
+        for row, key, message in violations:
+            log += f"\n  row {row}: {key}: {message}"
+        super().__init__(log)
+
+    pass
+
+
+def fn_kwargs_many_into_yaml(
+    name: str,
+    parsed_fn: ParsedFunction,
+    rows: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Validate keyword arguments of many calls at once and convert them into
+    AML-ish configurations. Values are checked column by column, so numeric
+    ranges are compared in one pass per field, and every violation is reported
+    together instead of stopping at the first one."""
+
+    fields = parsed_fn.fields_by_name
+    violations: List[Tuple[int, str, str]] = []
+    for i, row in enumerate(rows):
+        if not row.keys() <= fields.keys():
+            violations.extend(
+                (i, key, "unknown field") for key in row if key not in fields
+            )
+
+    columns: Dict[str, List[Any]] = {}
     for key, field in fields.items():
-        if key in raw_kwargs:
-            raw_value = raw_kwargs[key]
-            value = field.draft.fn_load_cli(raw_value)
+        draft = field.draft
+        try:
+            values = [row[key] for row in rows]
+            given: Sequence[int] = range(len(rows))
+        except KeyError:
+            given = [i for i, row in enumerate(rows) if key in row]
+            values = [rows[i][key] for i in given]
+        # the default is validated and dumped once for all rows that omit it
+        if len(given) < len(rows):
+            default = field.py_default
+            if default is ...:
+                missing = set(range(len(rows))).difference(given)
+                violations.extend((i, key, "missing") for i in sorted(missing))
+                default_raw = None
+            elif validation_err := draft.fn_post_validate(default):
+                raise ValueError(f"invalid default for '{key}': {validation_err}")
+            else:
+                default_raw = draft.fn_dump_yaml(default)
+
+        if draft.aml_type in ("integer", "number"):
+            lo, hi = draft.aml_min, draft.aml_max
+            present = (
+                [x for x in values if x is not None] if field.aml_optional else values
+            )
+            # bounds of the whole column first, rows only if they are violated.
+            # nan compares false to everything, so it is always checked per row
+            bounded = lo is not None or hi is not None
+            if (
+                bounded
+                and present
+                and (
+                    (lo is not None and min(present) < lo)
+                    or (hi is not None and max(present) > hi)
+                    or any(x != x for x in present)
+                )
+            ):
+                lo = float("-inf") if lo is None else lo
+                hi = float("inf") if hi is None else hi
+                message = f"assert {draft.aml_min} <= x <= {draft.aml_max}"
+                violations.extend(
+                    (given[j], key, message)
+                    for j, x in enumerate(values)
+                    if x is not None and not lo <= x <= hi
+                )
+            raw_values = values  # numbers are dumped as-is
+        else:
+            errs = list(map(draft.fn_post_validate, values))
+            if any(errs):
+                violations.extend(
+                    (given[j], key, err) for j, err in enumerate(errs) if err
+                )
+            if draft.fn_dump_yaml is identity:
+                raw_values = values
+            else:
+                raw_values = list(map(draft.fn_dump_yaml, values))
+
+        if len(given) == len(rows):
+            columns[key] = raw_values
         else:
-            value = copy.deepcopy(field.py_default)
-        validation_err = field.draft.fn_post_validate(value)
-        if validation_err:
-            raise ValueError(f"invalid value for '--{key}': {validation_err}")
-        kwargs[key] = value
+            column = [default_raw] * len(rows)
+            for i, raw in zip(given, raw_values):
+                column[i] = raw
+            columns[key] = column
 
-    return kwargs
+    if violations:
+        violations.sort(key=lambda v: v[0])
+        raise BindManyError(name, violations)
+    keys = list(columns)
+    return [dict(zip(keys, raw)) for raw in zip(*columns.values())] or [
+        {} for _ in rows
+    ]
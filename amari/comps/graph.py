@@ -0,0 +1,276 @@
+import array
+import dataclasses
+import unittest
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Tuple, Union
+
+from .env import BuiltComponentConfig
+
+if TYPE_CHECKING:
+    from ..comps import _FunctionalComponent
+    from ..pipel import _FunctionalPipeline
+
+    BuildNode = Union[_FunctionalComponent[Any], _FunctionalPipeline[Any]]
+
+
+def _int_array(values: Any = ()) -> "array.array[int]":
+    return array.array("q", values)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BuiltGraph:
+    """Flat, array-backed form of built configs. Nodes are numbered in preorder,
+    so every subtree is the contiguous range `[i, subtree_ends[i])` and parents
+    always come before their children. Children are stored in CSR layout:
+    node `i` has children `child_indices[child_offsets[i]:child_offsets[i+1]]`.
+    All traversals are iterative, so depth is not limited by recursion."""
+
+    # tables shared by the columns
+    components: List["BuildNode"]
+    kwargs: List[Dict[str, Any]]
+    # node columns
+    component_ids: "array.array[int]"
+    kwargs_ids: "array.array[int]"
+    parents: "array.array[int]"  # -1 for roots
+    subtree_ends: "array.array[int]"
+    # edges
+    child_offsets: "array.array[int]"
+    child_indices: "array.array[int]"
+
+    @staticmethod
+    def from_configs(configs: List[BuiltComponentConfig]) -> "BuiltGraph":
+        components: List["BuildNode"] = []
+        component_table: Dict[int, int] = {}
+        kwargs: List[Dict[str, Any]] = []
+        kwargs_table: Dict[Tuple[Any, ...], int] = {}
+        component_ids, kwargs_ids, parents = _int_array(), _int_array(), _int_array()
+
+        stack: List[Tuple[BuiltComponentConfig, int]] = [
+            (config, -1) for config in reversed(configs)
+        ]
+        while stack:
+            config, parent = stack.pop()
+            node = len(parents)
+            component_id = component_table.get(id(config.component))
+            if component_id is None:
+                component_id = component_table[id(config.component)] = len(components)
+                components.append(config.component)
+            try:
+                # `1 == 1.0 == True`, so values are told apart by type, and
+                # by component since their fields may be typed differently
+                kwargs_key = (component_id,) + tuple(
+                    (k, type(v), v) for k, v in config.raw_kwargs.items()
+                )
+                kwargs_id = kwargs_table.get(kwargs_key)
+                if kwargs_id is None:
+                    kwargs_id = kwargs_table[kwargs_key] = len(kwargs)
+                    kwargs.append(config.raw_kwargs)
+            except TypeError:  # unhashable kwargs are not interned
+                kwargs_id = len(kwargs)
+                kwargs.append(config.raw_kwargs)
+            component_ids.append(component_id)
+            kwargs_ids.append(kwargs_id)
+            parents.append(parent)
+            stack.extend((child, node) for child in reversed(config.children))
+
+        return BuiltGraph._from_columns(
+            components, kwargs, component_ids, kwargs_ids, parents
+        )
+
+    @staticmethod
+    def _from_columns(
+        components: List["BuildNode"],
+        kwargs: List[Dict[str, Any]],
+        component_ids: "array.array[int]",
+        kwargs_ids: "array.array[int]",
+        parents: "array.array[int]",
+    ) -> "BuiltGraph":
+        n = len(parents)
+        # subtree sizes and child counts, children always come after parents
+        sizes = _int_array([1]) * n
+        counts = _int_array([0]) * (n + 1)
+        for i in range(n - 1, -1, -1):
+            parent = parents[i]
+            if parent >= 0:
+                sizes[parent] += sizes[i]
+                counts[parent + 1] += 1
+        child_offsets = counts
+        for i in range(n):
+            child_offsets[i + 1] += child_offsets[i]
+        child_indices = _int_array([0]) * child_offsets[n]
+        cursor = _int_array(child_offsets[:n])
+        for i in range(n):
+            parent = parents[i]
+            if parent >= 0:
+                child_indices[cursor[parent]] = i
+                cursor[parent] += 1
+        return BuiltGraph(
+            components=components,
+            kwargs=kwargs,
+            component_ids=component_ids,
+            kwargs_ids=kwargs_ids,
+            parents=parents,
+            subtree_ends=_int_array(i + sizes[i] for i in range(n)),
+            child_offsets=child_offsets,
+            child_indices=child_indices,
+        )
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def component(self, node: int) -> "BuildNode":
+        return self.components[self.component_ids[node]]
+
+    def raw_kwargs(self, node: int) -> Dict[str, Any]:
+        return self.kwargs[self.kwargs_ids[node]]
+
+    def children(self, node: int) -> "array.array[int]":
+        return self.child_indices[
+            self.child_offsets[node] : self.child_offsets[node + 1]
+        ]
+
+    def roots(self) -> List[int]:
+        return [i for i, parent in enumerate(self.parents) if parent < 0]
+
+    def walk(self, node: int) -> Iterator[int]:
+        """Nodes of the subtree at `node` in preorder."""
+
+        return iter(range(node, self.subtree_ends[node]))
+
+    def topological_order(self, children_first: bool = False) -> List[int]:
+        """Parents before children (preorder), or children before parents
+        (postorder) when e.g. children must be registered first."""
+
+        if not children_first:
+            return list(range(len(self)))
+        order: List[int] = []
+        stack: List[Tuple[int, bool]] = [
+            (root, False) for root in reversed(self.roots())
+        ]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(self.children(node)))
+        return order
+
+    def subgraph(self, node: int) -> "BuiltGraph":
+        """Slice out the subtree at `node`; tables are shared with this graph."""
+
+        begin, end = node, self.subtree_ends[node]
+        parents = _int_array(p - begin for p in self.parents[begin:end])
+        parents[0] = -1
+        return BuiltGraph._from_columns(
+            self.components,
+            self.kwargs,
+            self.component_ids[begin:end],
+            self.kwargs_ids[begin:end],
+            parents,
+        )
+
+    def to_configs(self) -> List[BuiltComponentConfig]:
+        """Convert back into nested configs, one per root."""
+
+        n = len(self)
+        built: List[Any] = [None] * n
+        for i in range(n - 1, -1, -1):
+            built[i] = BuiltComponentConfig(
+                component=self.component(i),
+                raw_kwargs=self.raw_kwargs(i),
+                children=[built[child] for child in self.children(i)],
+            )
+        return [built[root] for root in self.roots()]
+
+    pass
+
+
+class BuiltGraphTests(unittest.TestCase):
+    def test_round_trip(self):
+        from ..comps import component
+        from ..pipel import pipeline
+        from .env import BuiltComponentSink
+
+        @component(name="amari.comps.test.graph.foo")
+        def foo(x_num: int) -> None:
+            pass
+
+        @pipeline(name="amari.comps.test.graph.core")
+        def ppl_core(x_num: int) -> None:
+            foo(x_num)
+            foo(x_num + 1)
+
+        @pipeline(name="amari.comps.test.graph.main")
+        def ppl_main(x_num: int) -> None:
+            ppl_core(x_num)
+            foo(x_num)
+            ppl_core(x_num * 10)
+
+        sink = BuiltComponentSink.create()
+        ppl_main._build(1)
+        ppl_core._build(5)
+        configs = sink.dump()
+        graph = BuiltGraph.from_configs(configs)
+
+        self.assertEqual(len(graph), 11)
+        self.assertEqual(graph.roots(), [0, 8])
+        self.assertEqual(list(graph.children(0)), [1, 4, 5])
+        self.assertEqual(list(graph.parents), [-1, 0, 1, 1, 0, 0, 5, 5, -1, 8, 8])
+        # `foo(1)` is built twice but only stored once
+        self.assertEqual(graph.kwargs_ids[2], graph.kwargs_ids[4])
+        self.assertEqual(len(graph.components), 3)
+        self.assertEqual(graph.to_configs(), configs)
+
+        sub = graph.subgraph(5)
+        self.assertEqual(list(sub.walk(0)), [0, 1, 2])
+        self.assertEqual(sub.to_configs(), [configs[0].children[2]])
+        self.assertEqual(list(graph.walk(1)), [1, 2, 3])
+
+        order = graph.topological_order(children_first=True)
+        self.assertEqual(order, [2, 3, 1, 4, 6, 7, 5, 0, 9, 10, 8])
+        position = {node: i for i, node in enumerate(order)}
+        for node in range(len(graph)):
+            for child in graph.children(node):
+                self.assertLess(position[child], position[node])
+
+    def test_kwargs_types(self):
+        component_a: Any = object()
+        component_b: Any = object()
+        configs = [
+            BuiltComponentConfig(component=component_a, raw_kwargs=kw, children=[])
+            for kw in [{"x": 1}, {"x": True}, {"x": 1.0}, {"x": 1}]
+        ]
+        configs.append(
+            BuiltComponentConfig(
+                component=component_b, raw_kwargs={"x": 1}, children=[]
+            )
+        )
+        graph = BuiltGraph.from_configs(configs)
+        self.assertEqual(len(graph.kwargs), 4)
+        self.assertEqual(graph.kwargs_ids[0], graph.kwargs_ids[3])
+        for node, config in enumerate(configs):
+            (value,) = graph.raw_kwargs(node).values()
+            self.assertIs(type(value), type(config.raw_kwargs["x"]))
+
+    def test_deep_graph(self):
+        import sys
+
+        component: Any = object()
+        depth = sys.getrecursionlimit() * 5
+        config = BuiltComponentConfig(component=component, raw_kwargs={}, children=[])
+        for i in range(depth - 1):
+            config = BuiltComponentConfig(
+                component=component, raw_kwargs={"i": i}, children=[config]
+            )
+        graph = BuiltGraph.from_configs([config])
+        self.assertEqual(len(graph), depth)
+        self.assertEqual(len(graph.kwargs), depth)
+        self.assertEqual(graph.topological_order(children_first=True)[0], depth - 1)
+        self.assertEqual(len(graph.subgraph(depth // 2)), depth - depth // 2)
+        (back,) = graph.to_configs()
+        for _ in range(depth - 1):
+            self.assertEqual(len(back.children), 1)
+            back = back.children[0]
+        self.assertEqual(back.children, [])
+
+    pass
@@ -0,0 +1,152 @@
+import json
+import time
+import unittest
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from ..utils.pyctx import PyCtx
+
+R = TypeVar("R")
+
+
+class BuildProfiler:
+    """Records wall time and call counts of build phases per component name.
+    Times are exclusive: a pipeline's `body` does not include the phases of the
+    components it builds, so the breakdown adds up to the total build time.
+
+    Phases:
+      - `validate`: checking call arguments (`fn_kwargs_from_py`)
+      - `defaults`: copying default values for omitted arguments
+      - `serialize`: dumping arguments into yaml (`fn_kwargs_into_yaml`)
+      - `body`: user code in pipeline functions
+      - `cache`: build cache lookups and stores
+      - `sink`: putting built configs into sinks"""
+
+    _ProfilerCtx: PyCtx["BuildProfiler"] = PyCtx(key="amari.comps.BuildProfiler")
+
+    def __init__(self):
+        # (name, phase) -> [calls, seconds]
+        self._stats: Dict[Tuple[str, str], List[Any]] = {}
+        self._nested: List[float] = []
+
+    @staticmethod
+    def create() -> "BuildProfiler":
+        """Profile every build made by the caller from now on."""
+
+        self = BuildProfiler()
+        BuildProfiler._ProfilerCtx.append(self, offset=1)
+        return self
+
+    @staticmethod
+    def current() -> Optional["BuildProfiler"]:
+        top = BuildProfiler._ProfilerCtx.get()
+        return top[-1] if top else None
+
+    def timed(
+        self, name: str, phase: str, fn: Callable[..., R], /, *args: Any, **kwargs: Any
+    ) -> R:
+        self._nested.append(0.0)
+        begin = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - begin
+            inner = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            stat = self._stats.setdefault((name, phase), [0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed - inner
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per component and phase, most expensive first."""
+
+        rows = [
+            {"name": name, "phase": phase, "calls": calls, "seconds": seconds}
+            for (name, phase), (calls, seconds) in self._stats.items()
+        ]
+        rows.sort(key=lambda row: (-row["seconds"], row["name"], row["phase"]))
+        return rows
+
+    def phases(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for (_name, phase), (_calls, seconds) in self._stats.items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+    def to_json(self) -> str:
+        return json.dumps({"phases": self.phases(), "components": self.stats()})
+
+    def report(self, limit: Optional[int] = None) -> str:
+        rows = self.stats()[:limit]
+        total = sum(self.phases().values())
+        lines = [f"{'seconds':>10} {'%':>6} {'calls':>8}  {'phase':<10} name"]
+        for row in rows:
+            share = 100.0 * row["seconds"] / total if total else 0.0
+            lines.append(
+                f"{row['seconds']:>10.4f} {share:>6.1f} {row['calls']:>8}  "
+                f"{row['phase']:<10} {row['name']}"
+            )
+        return "\n".join(lines)
+
+    pass
+
+
+def phase_timer(name: str) -> Callable[..., Any]:
+    """Returns `timed(phase, fn, *args, **kwargs)` recording into the active
+    profiler, or a plain call when profiling is disabled."""
+
+    profiler = BuildProfiler.current()
+    if profiler is None:
+        return _untimed
+    timed = profiler.timed
+    return lambda phase, fn, /, *args, **kwargs: timed(name, phase, fn, *args, **kwargs)
+
+
+def _untimed(_phase: str, fn: Callable[..., R], /, *args: Any, **kwargs: Any) -> R:
+    return fn(*args, **kwargs)
+
+
+class BuildProfilerTests(unittest.TestCase):
+    def test_profiler(self):
+        from ..comps import component
+        from ..pipel import pipeline
+        from .env import BuiltComponentSink
+
+        @component(name="amari.comps.test.profile.foo")
+        def foo(x_num: int, y_s: List[str] = ["a"]) -> None:
+            pass
+
+        @pipeline(name="amari.comps.test.profile.main")
+        def ppl_main(x_num: int) -> None:
+            time.sleep(0.05)
+            for i in range(x_num):
+                foo(i)
+
+        profiler = BuildProfiler.create()
+        sink = BuiltComponentSink.create()
+        ppl_main._build(20)
+        self.assertEqual(len(sink.dump()[0].children), 20)
+
+        stats = {(row["name"], row["phase"]): row for row in profiler.stats()}
+        body = stats[("amari.comps.test.profile.main", "body")]
+        self.assertEqual(body["calls"], 1)
+        self.assertGreaterEqual(body["seconds"], 0.05)
+        self.assertEqual(profiler.stats()[0], body)
+        for phase in ["validate", "defaults", "serialize", "sink"]:
+            self.assertEqual(
+                stats[("amari.comps.test.profile.foo", phase)]["calls"], 20
+            )
+        # exclusive times never exceed the wall time of the build
+        self.assertLess(sum(profiler.phases().values()), body["seconds"] + 0.05)
+
+        self.assertEqual(
+            json.loads(profiler.to_json())["components"][0]["phase"], "body"
+        )
+        self.assertIn("amari.comps.test.profile.main", profiler.report(limit=1))
+
+    def test_disabled(self):
+        self.assertIsNone(BuildProfiler.current())
+        self.assertIs(phase_timer("foo"), _untimed)
+        self.assertEqual(_untimed("validate", max, 1, 2), 2)
+
+    pass
@@ -0,0 +1,56 @@
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Union
+
+from ..utils.pyctx import PyCtx
+
+if TYPE_CHECKING:
+    from ..comps import _FunctionalComponent
+    from ..pipel import _FunctionalPipeline
+
+    BuildNode = Union[_FunctionalComponent[Any], _FunctionalPipeline[Any]]
+
+
+_NodeRegistry: Dict[str, "weakref.WeakSet[BuildNode]"] = {}
+
+
+def register_node(node: "BuildNode") -> None:
+    """Make a component or pipeline resolvable by name, e.g. from cached build
+    entries or for `validate_all`."""
+
+    _NodeRegistry.setdefault(node.name, weakref.WeakSet()).add(node)
+    return
+
+
+def registered_nodes() -> List["BuildNode"]:
+    """Every component and pipeline that is still alive, in name order."""
+
+    return [
+        node for name in sorted(_NodeRegistry) for node in list(_NodeRegistry[name])
+    ]
+
+
+def nodes_named(name: str) -> List["BuildNode"]:
+    """Every component and pipeline of that name that is still alive."""
+
+    return list(_NodeRegistry.get(name, ()))
+
+
+class LazyParse:
+    """Defers parsing the signatures of components and pipelines defined by the
+    caller (including in modules it imports) to their first use, so that only
+    the ones actually used are paid for. Invalid signatures are then reported on
+    first use, or all at once by `validate_all`. Signatures are parsed when
+    decorated by default."""
+
+    _LazyParseCtx: PyCtx[bool] = PyCtx(key="amari.comps.LazyParse")
+
+    @staticmethod
+    def set(enabled: bool = True) -> None:
+        LazyParse._LazyParseCtx.append(enabled, offset=1)
+
+    @staticmethod
+    def get() -> bool:
+        top = LazyParse._LazyParseCtx.get()
+        return top[-1] if top else False
+
+    pass
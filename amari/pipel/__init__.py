@@ -1,15 +1,34 @@
+import concurrent.futures
+import contextvars
+import dataclasses
+import importlib
+import time
+import traceback
 import unittest
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from ..comps.env import BuiltComponentConfig, BuiltComponentSink, ComponentBuildEnv
+from ..comps.cache import BuildCache
+from ..comps.env import (
+    BuiltComponentConfig,
+    BuiltComponentSink,
+    BuiltComponentSummary,
+    BuildMemo,
+    BuiltComponentInterner,
+    ComponentBuildEnv,
+    LazyBuild,
+    LazyChildren,
+)
 from ..comps.fnexec import (
     fn_kwargs_from_cli,
     fn_kwargs_from_py,
     fn_kwargs_from_yaml,
     fn_kwargs_into_yaml,
+    fn_kwargs_replay_yaml,
 )
 from ..comps.nodes import Args, CallableNode
-from ..typecheck.args import parse_function
+from ..comps.profile import BuildProfiler, phase_timer
+from ..comps.registry import LazyParse, register_node
+from ..typecheck.args import ParsedFunction, parse_function
 from ..utils.types import guard_never
 
 
@@ -21,14 +40,28 @@ class _FunctionalPipeline(CallableNode[Args]):
         display_name: str,
         version: str,
         description: Optional[str],
+        is_deterministic: bool,
     ) -> None:
         self.fn = fn
         self.name = name
         self.display_name = display_name
         self.version = version
         self.description = description
+        self.is_deterministic = is_deterministic
+
+        self._parsed_fn: Optional[ParsedFunction] = None
+        if not LazyParse.get():
+            self.parsed_fn  # report invalid signatures right away
+        register_node(self)
 
-        self.parsed_fn = parse_function(fn)
+    @property
+    def parsed_fn(self) -> ParsedFunction:
+        """Parsed at decoration, or on first use under `LazyParse`, so that
+        importing many pipelines only pays for the ones that are actually used."""
+
+        if self._parsed_fn is None:
+            self._parsed_fn = parse_function(self.fn)
+        return self._parsed_fn
 
     def __call__(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
         env = ComponentBuildEnv.get()
@@ -40,27 +73,116 @@ class _FunctionalPipeline(CallableNode[Args]):
             guard_never(env)
 
     def _build(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
-        values = fn_kwargs_from_py(
-            name=self.name, parsed_fn=self.parsed_fn, args=args, kwargs=kwargs
+        timed = phase_timer(self.name)
+        values = timed(
+            "validate",
+            fn_kwargs_from_py,
+            name=self.name,
+            parsed_fn=self.parsed_fn,
+            args=args,
+            kwargs=kwargs,
+            copy_default=lambda fn, v: timed("defaults", fn, v),
+        )
+        raw_values = timed(
+            "serialize", fn_kwargs_into_yaml, parsed_fn=self.parsed_fn, kwargs=values
         )
+        # iterators were used up by serializing them, the body gets a replay
+        values = fn_kwargs_replay_yaml(self.parsed_fn, values, raw_values)
+        # non-deterministic pipelines are never reused, nor are their ancestors
+        if not self.is_deterministic:
+            BuildMemo.taint()
+        # reuse the subtree of an identical call in this build
+        lazy_depth = LazyBuild.get()
+        memo = BuildMemo.current() if lazy_depth is None else None
+        memo_key = None
+        if memo and self.is_deterministic:
+            memo_key = memo.key(self, raw_values)
+        if memo and memo_key and (memoized := memo.load(memo_key)) is not None:
+            built = BuiltComponentConfig(
+                component=self, raw_kwargs=raw_values, children=memoized
+            )
+            timed("sink", BuiltComponentSink.put, built)
+            return
+        # reuse a previously built subtree
+        cache = BuildCache.current() if self.is_deterministic else None
+        cache_key = timed("cache", cache.key, self, raw_values) if cache else ""
+        if cache and (cached := timed("cache", cache.load, cache_key)):
+            timed("sink", BuiltComponentSink.put, cached)
+            return
+        # defer the pipeline body until its children are accessed
+        if lazy_depth is not None and lazy_depth <= 0:
+            built = BuiltComponentConfig(
+                component=self,
+                raw_kwargs=raw_values,
+                children=LazyChildren(self._expander(raw_values)),
+            )
+            timed("sink", BuiltComponentSink.put, built)
+            return
+        begin = time.perf_counter()
         # capture pipeline component children
+        # (these bind to the calling frame, so they cannot be wrapped in `timed`)
         ComponentBuildEnv.set(ComponentBuildEnv.build)
+        if lazy_depth is not None:
+            LazyBuild.set(lazy_depth - 1)
+        memo_scope = BuildMemo.enter() if (memo and memo_key) or cache else None
 
         def _capture():
             sink = BuiltComponentSink.create()
-            self.fn(**values)  # type: ignore
-            return sink.dump()
+            timed("body", self.fn, **values)
+            return sink.dump(), sink.is_streaming
 
-        children = _capture()
+        children, streamed = _capture()
         # collect info for the pipeline
-        raw_values = fn_kwargs_into_yaml(parsed_fn=self.parsed_fn, kwargs=values)
-        BuiltComponentSink.put(
-            BuiltComponentConfig(
-                component=self, raw_kwargs=raw_values, children=children
-            )
+        built = BuiltComponentConfig(
+            component=self, raw_kwargs=raw_values, children=children
         )
+        # a non-deterministic sub-pipeline makes the whole subtree unsafe to reuse
+        stable = memo_scope is not None and memo_scope.deterministic
+        if memo and memo_key and stable and not streamed:
+            memo.store(memo_key, children)
+        # streamed children are already gone and lazy ones not yet built, so the
+        # subtree is incomplete
+        if cache and stable and not streamed and lazy_depth is None:
+            elapsed = time.perf_counter() - begin
+            timed("cache", cache.store, cache_key, built, elapsed=elapsed)
+        timed("sink", BuiltComponentSink.put, built)
         return
 
+    def _expander(
+        self, raw_values: Dict[str, Any]
+    ) -> Callable[[], List[BuiltComponentConfig]]:
+        """Defer `_expand` until first access, which may happen anywhere: it runs
+        with the cache, profiler and interner of this build, and on a replay of
+        the recorded arguments rather than on objects the caller may mutate."""
+
+        context = contextvars.copy_context()
+        cache = BuildCache.current()
+        profiler = BuildProfiler.current()
+        interner = BuiltComponentInterner.current()
+
+        def _run() -> List[BuiltComponentConfig]:
+            # the frames that set these up may be gone by now, so bind them here
+            if cache is not None:
+                BuildCache._BuildCacheCtx.append(cache)
+            if profiler is not None:
+                BuildProfiler._ProfilerCtx.append(profiler)
+            if interner is not None:
+                BuiltComponentInterner._InternerCtx.append(interner)
+            values = fn_kwargs_from_yaml(parsed_fn=self.parsed_fn, kwargs=raw_values)
+            return self._expand(values)
+
+        return lambda: context.run(_run)
+
+    def _expand(self, values: Dict[str, Any]) -> List[BuiltComponentConfig]:
+        """Build children of a lazily built pipeline, with its sub-pipelines
+        lazy again."""
+
+        ComponentBuildEnv.set(ComponentBuildEnv.build)
+        LazyBuild.set(0)
+        sink = BuiltComponentSink.create()
+        self.fn(**values)  # type: ignore
+        return sink.dump()
+
     def _run_py(self, *args: Args.args, **kwargs: Args.kwargs) -> None:
         values = fn_kwargs_from_py(
             name=self.name, parsed_fn=self.parsed_fn, args=args, kwargs=kwargs
@@ -83,6 +205,7 @@ def pipeline(
     display_name: Optional[str] = None,
     version: str = "0.0.1",
     description: Optional[str] = None,
+    is_deterministic: bool = True,
 ):
     def _decorate(fn: Callable[Args, None]) -> _FunctionalPipeline[Args]:
         return _FunctionalPipeline[Args](
@@ -91,11 +214,117 @@ def pipeline(
             display_name=display_name or name,
             version=version,
             description=description,
+            is_deterministic=is_deterministic,
         )
 
     return _decorate
 
 
+@dataclasses.dataclass
+class PipelineBuildJob:
+    # either the pipeline itself or an importable reference `module:attr`
+    pipeline: Union[_FunctionalPipeline[Any], str]
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    def resolve(self) -> _FunctionalPipeline[Any]:
+        if not isinstance(self.pipeline, str):
+            return self.pipeline
+        module_name, sep, attr = self.pipeline.partition(":")
+        if not sep or not module_name or not attr:
+            raise ValueError(f"invalid pipeline reference '{self.pipeline}'")
+        target: Any = importlib.import_module(module_name)
+        for part in attr.split("."):
+            target = getattr(target, part)
+        if not isinstance(target, _FunctionalPipeline):
+            raise TypeError(f"'{self.pipeline}' is not a pipeline")
+        return target
+
+    pass
+
+
+@dataclasses.dataclass
+class PipelineBuildResult:
+    ref: str
+    summary: Optional[BuiltComponentSummary]
+    # formatted traceback of the failed build
+    error: Optional[str]
+    pass
+
+
+def build_pipeline(
+    ppl: _FunctionalPipeline[Args], *args: Args.args, **kwargs: Args.kwargs
+) -> BuiltComponentConfig:
+    """Build a single pipeline and return its config. The build runs in a fresh
+    context, so its sink and build mode are isolated from the caller and from
+    builds running on other threads."""
+
+    def _build() -> BuiltComponentConfig:
+        sink = BuiltComponentSink.create()
+        ppl._build(*args, **kwargs)
+        return sink.dump()[0]
+
+    return contextvars.Context().run(_build)
+
+
+def build_pipelines(
+    jobs: Iterable[PipelineBuildJob], max_workers: Optional[int] = None
+) -> List[BuiltComponentConfig]:
+    """Build independent pipelines concurrently on a thread pool. Results are
+    returned in the order of `jobs`; the first failing build raises."""
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_build_job, job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def build_many(
+    jobs: Iterable[Union[str, PipelineBuildJob]], max_workers: Optional[int] = None
+) -> List[PipelineBuildResult]:
+    """Build pipelines given by importable references (`module:attr`) across a
+    process pool. Results come back in the order of `jobs`, and a failing build
+    only reports its own error instead of aborting the others."""
+
+    ref_jobs = [PipelineBuildJob(j) if isinstance(j, str) else j for j in jobs]
+    for job in ref_jobs:
+        if not isinstance(job.pipeline, str):
+            raise TypeError(
+                f"pipeline '{job.pipeline.name}' must be given by reference "
+                "'module:attr' to be built in another process"
+            )
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_build_many_worker, job) for job in ref_jobs]
+        results: List[PipelineBuildResult] = []
+        for job, future in zip(ref_jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as err:
+                # the worker itself died or the result could not be pickled
+                results.append(
+                    PipelineBuildResult(
+                        ref=str(job.pipeline),
+                        summary=None,
+                        error="".join(traceback.format_exception(err)),
+                    )
+                )
+        return results
+
+
+def _build_job(job: PipelineBuildJob) -> BuiltComponentConfig:
+    return build_pipeline(job.resolve(), *job.args, **job.kwargs)
+
+
+def _build_many_worker(job: PipelineBuildJob) -> PipelineBuildResult:
+    try:
+        summary = _build_job(job).summarize()
+    except Exception:
+        return PipelineBuildResult(
+            ref=str(job.pipeline), summary=None, error=traceback.format_exc()
+        )
+    return PipelineBuildResult(ref=str(job.pipeline), summary=summary, error=None)
+
+
 class PipelineTest(unittest.TestCase):
     def test_pipeline_sink(self):
         from ..comps import component
@@ -128,4 +357,295 @@ class PipelineTest(unittest.TestCase):
         self.assertEqual(children[1].component.name, "amari.pipel.test.foo")
         self.assertEqual(children[1].raw_kwargs, {"x_num": 120})
 
+    def test_pipeline_threaded(self):
+        from ..comps import component
+
+        @component(name="amari.pipel.test.leaf")
+        def leaf(x_num: int) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.branch")
+        def ppl_branch(x_num: int) -> None:
+            for i in range(x_num % 5 + 1):
+                leaf(x_num * 100 + i)
+
+        @pipeline(name="amari.pipel.test.root")
+        def ppl_root(x_num: int) -> None:
+            ppl_branch(x_num)
+            leaf(-x_num)
+            ppl_branch(x_num + 1)
+
+        def expected(x_num: int) -> list:
+            def _branch(n: int) -> list:
+                return [n * 100 + i for i in range(n % 5 + 1)]
+
+            return [_branch(x_num), -x_num, _branch(x_num + 1)]
+
+        def flatten(built: BuiltComponentConfig) -> list:
+            ret = []
+            for child in built.children:
+                if child.children:
+                    ret.append([c.raw_kwargs["x_num"] for c in child.children])
+                else:
+                    ret.append(child.raw_kwargs["x_num"])
+            return ret
+
+        jobs = [PipelineBuildJob(ppl_root, args=(i,)) for i in range(400)]
+        results = build_pipelines(jobs, max_workers=16)
+        self.assertEqual(len(results), len(jobs))
+        for i, built in enumerate(results):
+            self.assertEqual(built.raw_kwargs, {"x_num": i})
+            self.assertEqual(flatten(built), expected(i))
+        # builds never leak into the caller
+        self.assertEqual(ComponentBuildEnv.get(), ComponentBuildEnv.run)
+        with self.assertRaises(ValueError):
+            BuiltComponentSink.put(results[0])
+
+    def test_pipeline_build_many(self):
+        import pathlib
+        import sys
+        import tempfile
+        import textwrap
+
+        source = textwrap.dedent("""
+            from amari.comps import component
+            from amari.pipel import pipeline
+
+            @component(name="amari.pipel.test.many.foo")
+            def foo(x_num: int) -> None:
+                pass
+
+            @pipeline(name="amari.pipel.test.many.main")
+            def ppl_main(x_num: int = 1) -> None:
+                foo(x_num)
+                foo(x_num + 1)
+
+            @pipeline(name="amari.pipel.test.many.broken")
+            def ppl_broken() -> None:
+                raise RuntimeError("broken pipeline")
+            """)
+        with tempfile.TemporaryDirectory() as tmp:
+            module = "_amari_pipel_test_build_many"
+            pathlib.Path(tmp, f"{module}.py").write_text(source)
+            sys.path.insert(0, tmp)
+            try:
+                results = build_many(
+                    [
+                        PipelineBuildJob(f"{module}:ppl_main", args=(5,)),
+                        f"{module}:ppl_broken",
+                        f"{module}:ppl_main",
+                        f"{module}:missing",
+                        f"{module}:foo",
+                    ],
+                    max_workers=2,
+                )
+            finally:
+                sys.path.remove(tmp)
+                sys.modules.pop(module, None)
+
+        self.assertEqual(
+            [r.ref for r in results],
+            [f"{module}:ppl_main", f"{module}:ppl_broken", f"{module}:ppl_main"]
+            + [f"{module}:missing", f"{module}:foo"],
+        )
+        summary = results[0].summary
+        assert summary is not None
+        self.assertEqual(summary.name, "amari.pipel.test.many.main")
+        self.assertEqual(summary.raw_kwargs, {"x_num": 5})
+        self.assertEqual(
+            [(c.name, c.raw_kwargs) for c in summary.children],
+            [("amari.pipel.test.many.foo", {"x_num": 5})]
+            + [("amari.pipel.test.many.foo", {"x_num": 6})],
+        )
+        self.assertIsNone(results[0].error)
+        self.assertIn("broken pipeline", results[1].error or "")
+        self.assertEqual(
+            results[2].summary and results[2].summary.raw_kwargs, {"x_num": 1}
+        )
+        self.assertIn("AttributeError", results[3].error or "")
+        self.assertIn("is not a pipeline", results[4].error or "")
+
+    def test_pipeline_lazy(self):
+        from ..comps import component
+        from ..comps.env import expand_lazy
+
+        calls: List[str] = []
+
+        @component(name="amari.pipel.test.lazy.foo")
+        def foo(x_num: int) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.lazy.core")
+        def ppl_core(x_num: int) -> None:
+            calls.append(f"core({x_num})")
+            foo(x_num)
+
+        @pipeline(name="amari.pipel.test.lazy.main")
+        def ppl_main(x_num: int) -> None:
+            calls.append(f"main({x_num})")
+            ppl_core(x_num)
+            ppl_core(x_num + 1)
+
+        def build(depth: Optional[int]) -> BuiltComponentConfig:
+            if depth is not None:
+                LazyBuild.set(depth)
+            sink = BuiltComponentSink.create()
+            ppl_main._build(1)
+            return sink.dump()[0]
+
+        eager = build(None)
+        self.assertEqual(calls, ["main(1)", "core(1)", "core(2)"])
+
+        calls.clear()
+        top = build(0)
+        self.assertEqual(calls, [])
+        self.assertEqual(top.raw_kwargs, {"x_num": 1})
+        self.assertEqual(len(top.children), 2)
+        self.assertEqual(calls, ["main(1)"])
+        self.assertEqual(top.children[1].children[0].raw_kwargs, {"x_num": 2})
+        self.assertEqual(calls, ["main(1)", "core(2)"])
+
+        calls.clear()
+        partial = build(1)
+        self.assertEqual(calls, ["main(1)"])
+        expand_lazy(partial)
+        self.assertEqual(calls, ["main(1)", "core(1)", "core(2)"])
+        self.assertEqual(partial, eager)
+        self.assertEqual(build(2), eager)
+
+    def test_pipeline_lazy_context(self):
+        from ..comps import component
+        from ..comps.profile import BuildProfiler
+
+        @component(name="amari.pipel.test.lazyctx.foo")
+        def foo(x_s: List[str]) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.lazyctx.core")
+        def ppl_core(x_s: List[str]) -> None:
+            foo(x_s)
+
+        @pipeline(name="amari.pipel.test.lazyctx.main")
+        def ppl_main(x_s: List[str]) -> None:
+            ppl_core(x_s)
+
+        def build(x_s: List[str]) -> Tuple[BuiltComponentConfig, BuildProfiler]:
+            profiler = BuildProfiler.create()
+            LazyBuild.set(0)
+            sink = BuiltComponentSink.create()
+            ppl_main._build(x_s)
+            return sink.dump()[0], profiler
+
+        def access(top: BuiltComponentConfig) -> BuiltComponentConfig:
+            BuildProfiler.create()  # not the one of the build
+            return top.children[0].children[0]
+
+        x_s = ["a"]
+        top, profiler = build(x_s)
+        x_s.append("b")  # after the build, so it is not recorded
+        leaf = access(top)
+        self.assertEqual(leaf.raw_kwargs, {"x_s": '["a"]'})
+        # expanded within the profiler of the build
+        names = {row["name"] for row in profiler.stats()}
+        self.assertIn("amari.pipel.test.lazyctx.core", names)
+        self.assertIn("amari.pipel.test.lazyctx.foo", names)
+
+    def test_pipeline_iterable(self):
+        from ..comps import component
+
+        @component(name="amari.pipel.test.iterable.foo")
+        def foo(x_num: int) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.iterable.main")
+        def ppl_main(items: Iterable[int]) -> None:
+            for item in items:
+                foo(item)
+
+        sink = BuiltComponentSink.create()
+        ppl_main._build(i for i in range(3))
+        (built,) = sink.dump()
+        self.assertEqual(built.raw_kwargs, {"items": "[0, 1, 2]"})
+        self.assertEqual(
+            [c.raw_kwargs for c in built.children], [{"x_num": i} for i in range(3)]
+        )
+
+    def test_pipeline_memo(self):
+        from ..comps import component
+
+        calls: List[str] = []
+
+        @component(name="amari.pipel.test.memo.foo")
+        def foo(x_num: int) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.memo.core")
+        def ppl_core(x_num: int) -> None:
+            calls.append(f"core({x_num})")
+            foo(x_num)
+
+        @pipeline(name="amari.pipel.test.memo.rand", is_deterministic=False)
+        def ppl_rand(x_num: int) -> None:
+            calls.append(f"rand({x_num})")
+            foo(x_num)
+
+        @pipeline(name="amari.pipel.test.memo.wrap")
+        def ppl_wrap(x_num: int) -> None:
+            ppl_rand(x_num)
+
+        @pipeline(name="amari.pipel.test.memo.main")
+        def ppl_main(x_num: int) -> None:
+            for i in range(x_num):
+                ppl_core(i % 2)
+                ppl_rand(0)
+
+        @pipeline(name="amari.pipel.test.memo.outer")
+        def ppl_outer(x_num: int) -> None:
+            for _ in range(x_num):
+                ppl_wrap(0)
+
+        def build(ppl: Any, x_num: int) -> BuiltComponentConfig:
+            sink = BuiltComponentSink.create()
+            ppl._build(x_num)
+            return sink.dump()[0]
+
+        # builds are not memoized unless asked to
+        build(ppl_main, 4)
+        self.assertEqual(calls, ["core(0)", "rand(0)", "core(1)", "rand(0)"] * 2)
+
+        calls.clear()
+        memo = BuildMemo.create()
+        built = build(ppl_main, 4)
+        self.assertEqual(
+            calls, ["core(0)", "rand(0)", "core(1)", "rand(0)", "rand(0)", "rand(0)"]
+        )
+        self.assertEqual((memo.hits, memo.misses), (2, 3))
+        self.assertEqual(built.children[0], built.children[4])
+        self.assertIs(built.children[0].children, built.children[4].children)
+        self.assertEqual(built.children[2].children[0].raw_kwargs, {"x_num": 1})
+
+        # an explicit memo is shared by all builds of the caller, but pipelines
+        # with a non-deterministic subtree are built again
+        calls.clear()
+        self.assertEqual(build(ppl_main, 4), built)
+        self.assertEqual(calls, ["rand(0)"] * 4)
+        self.assertEqual((memo.hits, memo.misses), (6, 4))
+
+        # even when the non-deterministic pipeline is nested deeper
+        calls.clear()
+        build(ppl_outer, 3)
+        self.assertEqual(calls, ["rand(0)"] * 3)
+
+        # `1 == 1.0`, but the calls are dumped differently
+        @component(name="amari.pipel.test.memo.leaf")
+        def leaf(x_s: str) -> None:
+            raise RuntimeError("should not be called")
+
+        @pipeline(name="amari.pipel.test.memo.sub")
+        def ppl_sub(x: float) -> None:
+            leaf(repr(x))
+
+        reprs = [build(ppl_sub, x).children[0].raw_kwargs["x_s"] for x in [1, 1.0]]
+        self.assertEqual(reprs, ["1", "1.0"])
+
     pass
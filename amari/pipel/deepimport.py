@@ -1,10 +1,15 @@
 import ast
+import dataclasses
+import hashlib
+import importlib.machinery
+import json
+import os
 import pathlib
+import site
 import sys
 import unittest
-from typing import Callable, Dict, Iterable, List, Literal, Optional, Set, Tuple, TypeAlias, cast
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Literal, Optional, Set, Tuple, TypeAlias, cast
 
-import black
 import pydantic
 
 SymbolName: TypeAlias = str
@@ -22,19 +27,99 @@ def get_deep_import_paths(
     return _get_deep_import_paths(path, get_code, lambda symbol: symbol in packages)
 
 
-def _get_packages() -> Set[str]:
-    pkgs: Set[str] = set()
-    py_root = pathlib.Path(sys.executable).parent
-    for root in [py_root / "Lib", py_root / "Lib" / "site-packages"]:
+def get_deep_import_graph(
+    path: CodePath,
+    get_code: Callable[[CodePath], Optional[CodeBlock]],
+) -> "ImportGraph":
+    packages = _get_packages()
+    return _get_deep_import_graph(path, get_code, lambda symbol: symbol in packages)
+
+
+_PACKAGES_CACHE_FORMAT = 2
+
+_Packages: Optional[FrozenSet[str]] = None
+
+
+def _get_packages() -> FrozenSet[str]:
+    """Top-level names of the standard library and of installed packages, i.e.
+    every import that is not part of the scanned code. Computed once per
+    process, and cached on disk until any site-packages directory changes."""
+
+    global _Packages
+    if _Packages is None:
+        dirs = _get_site_dirs()
+        _Packages = _load_packages(dirs, _get_packages_cache_file(dirs))
+    return _Packages
+
+
+def _get_site_dirs() -> List[pathlib.Path]:
+    # only where packages are installed: other `sys.path` entries such as the
+    # project root hold the very modules being scanned
+    candidates = list(getattr(site, "getsitepackages", lambda: [])())
+    candidates.append(site.getusersitepackages())
+    site_names = {"site-packages", "dist-packages"}
+    candidates += [p for p in sys.path if pathlib.Path(p).name in site_names]
+    dirs: Dict[pathlib.Path, None] = {}
+    for candidate in candidates:
+        path = pathlib.Path(candidate).resolve()
+        if path.is_dir():
+            dirs[path] = None
+    return list(dirs)
+
+
+def _get_packages_cache_file(dirs: List[pathlib.Path]) -> pathlib.Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    key = json.dumps([sys.executable, sys.version, [str(d) for d in dirs]])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return pathlib.Path(cache_home) / "amari" / f"packages-{digest}.json"
+
+
+def _load_packages(
+    dirs: List[pathlib.Path], cache_file: Optional[pathlib.Path]
+) -> FrozenSet[str]:
+    mtimes = {str(d): d.stat().st_mtime_ns for d in dirs}
+    if cache_file is not None:
+        try:
+            entry = json.loads(cache_file.read_text())
+            if entry["format"] == _PACKAGES_CACHE_FORMAT and entry["mtimes"] == mtimes:
+                return frozenset(entry["packages"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    pkgs = _scan_packages(dirs)
+    if cache_file is not None:
+        entry = {
+            "format": _PACKAGES_CACHE_FORMAT,
+            "mtimes": mtimes,
+            "packages": sorted(pkgs),
+        }
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry))
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass  # read-only home, just scan again next time
+    return pkgs
+
+
+def _scan_packages(dirs: List[pathlib.Path]) -> FrozenSet[str]:
+    pkgs: Set[str] = set(sys.stdlib_module_names) | set(sys.builtin_module_names)
+    suffixes = sorted(importlib.machinery.all_suffixes(), key=len, reverse=True)
+    for root in dirs:
         for p in root.iterdir():
             # not verified to work with symlinks or not
             if p.is_dir():
-                if p.name.isidentifier():
+                if p.name.isidentifier() and p.name != "__pycache__":
                     pkgs.add(p.name)
-            elif p.is_file() and p.suffix.lower().startswith(".py"):
-                if p.stem.isidentifier():
-                    pkgs.add(p.stem)
-    return pkgs
+            elif p.is_file():
+                for suffix in suffixes:
+                    if p.name.endswith(suffix):
+                        pkgs.add(p.name[: -len(suffix)])
+                        break
+    # distributions installed elsewhere (editable or path-based installs) are
+    # left out on purpose: they are usually the very project being scanned
+    return frozenset(pkg for pkg in pkgs if pkg.isidentifier())
 
 
 class ImportStatement(pydantic.BaseModel):
@@ -52,11 +137,39 @@ class ImportStatement(pydantic.BaseModel):
     """
 
     kind: Literal["import"]
-    code: CodeBlock
 
     module: list[SymbolName]
     symbols: list[tuple[SymbolName, SymbolName]]
     level: int
+
+    # formatted on first access, from the statement within its source file
+    _code: Optional[CodeBlock] = pydantic.PrivateAttr(default=None)
+    _source: Optional[Tuple[CodeBlock, ast.stmt]] = pydantic.PrivateAttr(default=None)
+
+    def __init__(self, code: Optional[CodeBlock] = None, **data: Any) -> None:
+        super().__init__(**data)
+        self._code = code
+
+    @pydantic.computed_field  # type: ignore[misc]
+    @property
+    def code(self) -> CodeBlock:
+        if self._code is None and self._source is not None:
+            source, node = self._source
+            self._code = _prettify_code(ast.get_source_segment(source, node) or "")
+            self._source = None
+        return self._code or ""
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ImportStatement):
+            return NotImplemented
+        return (self.kind, self.module, self.symbols, self.level, self.code) == (
+            other.kind,
+            other.module,
+            other.symbols,
+            other.level,
+            other.code,
+        )
+
     pass
 
 
@@ -75,29 +188,45 @@ def _parse_import_statement(
         symbols = []
         if node.names[0].asname is not None:
             symbols.append((module.pop(), node.names[0].asname))
-        return ImportStatement(
+        statement = ImportStatement(
             kind="import",
-            code=_prettify_code(code),
             module=module,
             symbols=symbols,
             level=0,
         )
     elif isinstance(node, ast.ImportFrom):
-        return ImportStatement(
+        statement = ImportStatement(
             kind="import",
-            code=_prettify_code(code),
             module=[i for i in (node.module or "").split(".") if i],
             symbols=[(i.name, i.asname or i.name) for i in node.names],
             level=node.level or 0,
         )
-    raise SyntaxError(f"unexpected import node: {ast.dump(node)}")
+    else:
+        raise SyntaxError(f"unexpected import node: {ast.dump(node)}")
+    statement._source = (code, node)
+    return statement
 
 
 def _prettify_code(code: CodeBlock) -> CodeBlock:
+    import black  # only needed when code is asked for
+
     code = black.format_str(code, mode=black.Mode())
     return code
 
 
+@dataclasses.dataclass(frozen=True, slots=True)
+class ImportGraph:
+    """Local modules reachable from a file. `order` lists every module once,
+    importers before the modules they import (apart from cycles), starting with
+    the file itself; `imports` are the edges and `cycles` every circular import
+    found, each as the chain of modules that leads back to its first one."""
+
+    order: List[CodePath]
+    imports: Dict[CodePath, List[CodePath]]
+    cycles: List[List[CodePath]]
+    pass
+
+
 def _get_deep_import_paths(
     path: CodePath,
     get_code: Callable[[CodePath], Optional[CodeBlock]],
@@ -105,16 +234,69 @@ def _get_deep_import_paths(
 ) -> List[CodePath]:
     """Fetches paths of all transitive imports from a Python file."""
 
-    code = get_code(path)
-    if code is None:
-        return []
+    return _get_deep_import_graph(path, get_code, is_package).order
+
+
+def _get_deep_import_graph(
+    path: CodePath,
+    get_code: Callable[[CodePath], Optional[CodeBlock]],
+    is_package: Callable[[str], bool],
+) -> ImportGraph:
+    """Resolves the import graph from a Python file, fetching and parsing every
+    module once. The traversal is iterative and does not follow circular
+    imports, so it is linear in the size of the graph."""
+
+    codes: Dict[CodePath, Optional[CodeBlock]] = {}
+
+    def exists(p: CodePath) -> bool:
+        if p not in codes:
+            codes[p] = get_code(p)
+        return codes[p] is not None
+
+    imports: Dict[CodePath, List[CodePath]] = {}
+    cycles: List[List[CodePath]] = []
+    postorder: List[CodePath] = []
+    if not exists(path):
+        return ImportGraph(order=[], imports={}, cycles=[])
+    # dfs with the path of modules being visited, and a cursor of their imports
+    visiting: Dict[CodePath, int] = {path: 0}
+    stack: List[Tuple[CodePath, int]] = [(path, 0)]
+    imports[path] = _get_local_imports(path, codes[path] or "", exists, is_package)
+    while stack:
+        node, cursor = stack[-1]
+        children = imports[node]
+        if cursor == len(children):
+            stack.pop()
+            del visiting[node]
+            postorder.append(node)
+            continue
+        stack[-1] = (node, cursor + 1)
+        child = children[cursor]
+        if child in visiting:
+            cycles.append([p for p, _ in stack[visiting[child] :]] + [child])
+        elif child not in imports:
+            visiting[child] = len(stack)
+            stack.append((child, 0))
+            code = codes[child] or ""
+            imports[child] = _get_local_imports(child, code, exists, is_package)
+    return ImportGraph(order=postorder[::-1], imports=imports, cycles=cycles)
+
+
+def _get_local_imports(
+    path: CodePath,
+    code: CodeBlock,
+    exists: Callable[[CodePath], bool],
+    is_package: Callable[[str], bool],
+) -> List[CodePath]:
+    """Existing local modules imported by the code at `path`, in order."""
+
     node = ast.parse(code)
     imports: List[ImportStatement] = []
     for stmt in _iter_ast_nodes(node):
         if isinstance(stmt, ast.Import) or isinstance(stmt, ast.ImportFrom):
             imports.append(_parse_import_statement(code, stmt))
 
-    result = [path]
+    result: Dict[CodePath, None] = {}
     for imp in imports:
         if imp.level == 0:
             the_symbol = imp.module[0] if imp.module else imp.symbols[0][0]
@@ -125,14 +307,13 @@ def _get_deep_import_paths(
             child = child[: -imp.level]
         child = child + tuple(imp.module)
         # 2 in case we miss files like `from . import foo``+
-        result += _get_deep_import_paths(child, get_code, is_package)
-        result += _get_deep_import_paths(child + ("__init__",), get_code, is_package)
+        candidates = [child, child + ("__init__",)]
         for sym in imp.symbols:
-            result += _get_deep_import_paths(child + (sym[0],), get_code, is_package)
-            result += _get_deep_import_paths(
-                child + (sym[0], "__init__"), get_code, is_package
-            )
-    return result
+            candidates += [child + (sym[0],), child + (sym[0], "__init__")]
+        for candidate in candidates:
+            if candidate not in result and exists(candidate):
+                result[candidate] = None
+    return list(result)
 
 
 def _iter_ast_nodes(node: ast.AST) -> Iterable[ast.AST]:
@@ -187,6 +368,30 @@ class DeepImportParserTests(unittest.TestCase):
             level=3,
         )
 
+    def test_lazy_code(self):
+        import subprocess
+        import textwrap
+
+        code = "import os\nfor _ in []:\n    from  ..utils  import (b,\n  a as c)\n"
+        node = cast(ast.For, ast.parse(code).body[1]).body[0]
+        stmt = _parse_import_statement(code, cast(ast.ImportFrom, node))
+        self.assertEqual(stmt.code, "from ..utils import b, a as c\n")
+        self.assertEqual(stmt.model_dump()["code"], "from ..utils import b, a as c\n")
+
+        # scanning never loads black
+        script = textwrap.dedent(
+            """
+            import sys
+            from amari.pipel.deepimport import _get_deep_import_paths
+            paths = {"a": "from . import b\\n", "b": "import os\\n"}
+            get_code = lambda path: paths.get("/".join(path))
+            _get_deep_import_paths(("a",), get_code, lambda symbol: False)
+            assert "black" not in sys.modules
+            """
+        )
+        root = pathlib.Path(__file__).parents[2]
+        subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+
     def test_deep_imports(self):
         paths: Dict[str, str] = {
             "src/run": "import numpy\nfrom . import foo\nfor _ in []:\n    if True:\n        from ..config import ConfigType\n",
@@ -211,10 +416,104 @@ class DeepImportParserTests(unittest.TestCase):
         }
         self.assertEqual(sorted("/".join(p) for p in deep_imports), sorted(expected))
 
+    def test_import_cycles(self):
+        paths: Dict[str, str] = {
+            "main": "from .src import run\nimport numpy\n",
+            "src/run": "from . import foo, bar\nfrom .foo import x\n",
+            "src/foo": "from .. import main\nfrom . import bar\n",
+            "src/bar": "from .foo import y\nfrom ..lib import util\n",
+            "lib/util": "import os\n",
+        }
+        fetched: List[str] = []
+
+        def get_code(path: CodePath) -> Optional[CodeBlock]:
+            fetched.append("/".join(path))
+            return paths.get("/".join(path), None)
+
+        graph = _get_deep_import_graph(
+            path=("main",),
+            get_code=get_code,
+            is_package=lambda symbol: symbol in {"numpy", "os"},
+        )
+        self.assertEqual(
+            ["/".join(p) for p in graph.order],
+            ["main", "src/run", "src/foo", "src/bar", "lib/util"],
+        )
+        self.assertEqual(len(fetched), len(set(fetched)))
+        self.assertEqual(
+            [["/".join(p) for p in cycle] for cycle in graph.cycles],
+            [
+                ["main", "src/run", "src/foo", "main"],
+                ["src/foo", "src/bar", "src/foo"],
+            ],
+        )
+        self.assertEqual(
+            graph.imports[("src", "run")], [("src", "foo"), ("src", "bar")]
+        )
+
+        # long chains do not hit the recursion limit
+        chain = {f"m{i}": f"from . import m{i + 1}\n" for i in range(5000)}
+        graph = _get_deep_import_graph(
+            path=("m0",),
+            get_code=lambda path: chain.get("/".join(path), None),
+            is_package=lambda symbol: False,
+        )
+        self.assertEqual(len(graph.order), 5000)
+        self.assertEqual(graph.order[-1], ("m4999",))
+
     def test_packages(self):
-        pkgs = _get_packages()
-        print(pkgs)
+        import tempfile
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+                with mock.patch(f"{__name__}._Packages", None):
+                    pkgs = _get_packages()
+            self.assertTrue(list(pathlib.Path(tmp, "amari").glob("packages-*.json")))
         self.assertIn("os", pkgs)
         self.assertIn("typing", pkgs)
+        self.assertIn("pydantic", pkgs)
+
+    def test_packages_cache(self):
+        import tempfile
+        from unittest import mock
+
+        with tempfile.TemporaryDirectory() as tmp:
+            site_dir = pathlib.Path(tmp) / "site-packages"
+            (site_dir / "foo").mkdir(parents=True)
+            (site_dir / "bar.py").write_text("")
+            ext_suffix = importlib.machinery.EXTENSION_SUFFIXES[0]
+            (site_dir / f"baz{ext_suffix}").write_text("")
+            (site_dir / "foo-1.0.dist-info").mkdir()
+            # an editable install of a project living outside the site dir
+            dist_info = site_dir / "proj-1.0.dist-info"
+            dist_info.mkdir()
+            (dist_info / "METADATA").write_text("Name: proj\nVersion: 1.0\n")
+            (dist_info / "top_level.txt").write_text("projpkg\n")
+            (dist_info / "direct_url.json").write_text(
+                json.dumps({"url": f"file://{tmp}/proj", "dir_info": {"editable": True}})
+            )
+            cache_file = pathlib.Path(tmp) / "cache" / "packages.json"
+
+            with mock.patch.object(sys, "path", [str(site_dir), *sys.path]):
+                pkgs = _load_packages([site_dir], cache_file)
+            self.assertTrue({"foo", "bar", "baz", "sys"} <= pkgs)
+            self.assertNotIn("foo-1.0.dist-info", pkgs)
+            self.assertNotIn("projpkg", pkgs)
+            self.assertTrue(cache_file.exists())
+
+            # reused while the site directory is unchanged
+            entry = json.loads(cache_file.read_text())
+            entry["packages"].append("cached")
+            cache_file.write_text(json.dumps(entry))
+            self.assertIn("cached", _load_packages([site_dir], cache_file))
+
+            # and rescanned once it changes
+            (site_dir / "qux").mkdir()
+            mtime = site_dir.stat().st_mtime_ns + 1_000_000_000
+            os.utime(site_dir, ns=(mtime, mtime))
+            pkgs = _load_packages([site_dir], cache_file)
+            self.assertIn("qux", pkgs)
+            self.assertNotIn("cached", pkgs)
 
     pass
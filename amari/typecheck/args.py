@@ -2,20 +2,97 @@ import dataclasses
 import datetime
 import inspect
 import unittest
-from typing import Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from .defs import Field, ValidationError, _FieldInfo
-from .fmt import ParsedInputField, parse_input_field
+from .fmt import ParsedInputField, identity, parse_input_field
 
+# copy_default(fn_copy_default, py_default) -> value, to wrap default copies
+DefaultCopier = Callable[[Callable[[Any], Any], Any], Any]
+# bind_py(name, args, kwargs, copy_default) -> kwargs
+PyBinder = Callable[
+    [str, Tuple[Any, ...], Dict[str, Any], DefaultCopier], Dict[str, Any]
+]
+# bind_raw(raw_kwargs) -> kwargs, for yaml values or cli strings
+RawBinder = Callable[[Dict[str, Any]], Dict[str, Any]]
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class ParsedFunction:
     name: str
     py_impl: Callable[..., None]
     fields: List[ParsedInputField]
+    fields_by_name: Dict[str, ParsedInputField]
+    bind_py: PyBinder
+    bind_yaml: RawBinder
+    bind_cli: RawBinder
     pass
 
 
+def _compile_binders(
+    fields: List[ParsedInputField],
+) -> Tuple[PyBinder, RawBinder, RawBinder]:
+    """Generate straight-line argument binders for the fields, with the per-field
+    lookups, default handling and validation unrolled. Defaults are read from the
+    fields on every call so that they can still be swapped after parsing, and
+    are only copied for types with mutable values."""
+
+    scope: Dict[str, Any] = {}
+    py_lines = ["def bind_py(name, args, kwargs, copy_default):", "    n = len(args)"]
+    yaml_lines = ["def bind_yaml(raw):"]
+    cli_lines = ["def bind_cli(raw):"]
+    for i, field in enumerate(fields):
+        key = field.name
+        scope[f"f{i}"] = field
+        scope[f"check{i}"] = field.draft.fn_post_validate
+        scope[f"load_yaml{i}"] = field.draft.fn_load_yaml
+        scope[f"load_cli{i}"] = field.draft.fn_load_cli
+        scope[f"copy{i}"] = field.fn_copy_default
+        shared = field.fn_copy_default is identity
+
+        def check(label: str) -> List[str]:
+            return [
+                f"    err = check{i}(v{i})",
+                "    if err:",
+                f"        raise ValueError(f\"invalid value for '{label}': {{err}}\")",
+            ]
+
+        py_lines += [
+            f"    if n > {i}:",
+            f"        v{i} = args[{i}]",
+            f"    elif {key!r} in kwargs:",
+            f"        v{i} = kwargs[{key!r}]",
+            "    else:",
+            f"        v{i} = f{i}.py_default",
+            f"        if v{i} is ...:",
+            "            raise TypeError(",
+            f"                f\"{{name}}() missing required positional argument: '{key}'\"",
+            "            )",
+            *([] if shared else [f"        v{i} = copy_default(copy{i}, v{i})"]),
+            *check(key),
+        ]
+        for lines, loader, label in [
+            (yaml_lines, "load_yaml", key),
+            (cli_lines, "load_cli", f"--{key}"),
+        ]:
+            lines += [
+                f"    if {key!r} in raw:",
+                f"        v{i} = {loader}{i}(raw[{key!r}])",
+                "    else:",
+                f"        v{i} = f{i}.py_default",
+                *([] if shared else [f"        if v{i} is not ...:"]),
+                *([] if shared else [f"            v{i} = copy{i}(v{i})"]),
+                *check(label),
+            ]
+    result = "{" + ", ".join(f"{f.name!r}: v{i}" for i, f in enumerate(fields)) + "}"
+    source = "\n".join(
+        [*py_lines, f"    return {result}", *yaml_lines, f"    return {result}"]
+        + [*cli_lines, f"    return {result}"]
+    )
+    exec(compile(source, f"<binders {[f.name for f in fields]}>", "exec"), scope)
+    return scope["bind_py"], scope["bind_yaml"], scope["bind_cli"]
+
+
 def parse_function(fn: Callable[..., None]) -> ParsedFunction:
     name = fn.__name__
     all_annotations = inspect.get_annotations(fn)
@@ -27,13 +104,13 @@ def parse_function(fn: Callable[..., None]) -> ParsedFunction:
     defaults = [...] * (len(annotations) - len(defaults)) + list(defaults)
     fields: List[ParsedInputField] = []
     errs: List[ValidationError] = []
-    for (name, typ), default in zip(annotations, defaults):
+    for (key, typ), default in zip(annotations, defaults):
         if isinstance(default, _FieldInfo):
             field = default
         else:
             field = Field(default)
         try:
-            parsed = parse_input_field(name, typ, field)
+            parsed = parse_input_field(key, typ, field)
             fields.append(parsed)
         except ValidationError as e:
             errs.append(e)
@@ -44,10 +121,15 @@ def parse_function(fn: Callable[..., None]) -> ParsedFunction:
             for line in str(err).split("\n"):
                 log += f"\n  {line}"
         raise ValidationError(log)
+    bind_py, bind_yaml, bind_cli = _compile_binders(fields)
     return ParsedFunction(
         name=name,
         py_impl=fn,
         fields=fields,
+        fields_by_name={field.name: field for field in fields},
+        bind_py=bind_py,
+        bind_yaml=bind_yaml,
+        bind_cli=bind_cli,
     )
 
 
@@ -73,4 +155,42 @@ class TypeCheckArgsTest(unittest.TestCase):
         with self.assertRaises(ValidationError):
             parse_function(bad_fn)
 
+    def test_binders(self):
+        def example_fn(
+            whisky: int,
+            wine: float = Field(0.5, min=0.0, max=1.0),
+            rum: List[str] = ["bacardi"],
+            brandy: Optional[int] = None,
+        ) -> None:
+            return
+
+        parsed = parse_function(example_fn)
+        self.assertEqual(
+            list(parsed.fields_by_name), ["whisky", "wine", "rum", "brandy"]
+        )
+        copy_default: DefaultCopier = lambda fn, x: fn(x)
+        values = parsed.bind_py("example_fn", (1,), {"brandy": 2}, copy_default)
+        self.assertEqual(
+            values, {"whisky": 1, "wine": 0.5, "rum": ["bacardi"], "brandy": 2}
+        )
+        self.assertIsNot(values["rum"], parsed.fields[2].py_default)
+        with self.assertRaisesRegex(
+            TypeError, "missing required positional argument: 'whisky'"
+        ):
+            parsed.bind_py("example_fn", (), {}, copy_default)
+        with self.assertRaisesRegex(ValueError, "invalid value for 'wine'"):
+            parsed.bind_py("example_fn", (1, 2.0), {}, copy_default)
+
+        parsed.fields[2].py_default = ["havana"]
+        self.assertEqual(
+            parsed.bind_yaml({"whisky": 1, "rum": '["malibu"]'}),
+            {"whisky": 1, "wine": 0.5, "rum": ["malibu"], "brandy": None},
+        )
+        self.assertEqual(
+            parsed.bind_cli({"whisky": "1", "brandy": ""}),
+            {"whisky": 1, "wine": 0.5, "rum": ["havana"], "brandy": None},
+        )
+        with self.assertRaisesRegex(ValueError, "invalid value for '--wine'"):
+            parsed.bind_cli({"whisky": "1", "wine": "-1"})
+
     pass
@@ -4,7 +4,7 @@
 import dataclasses
 import pathlib
 from types import EllipsisType
-from typing import Any, Literal, Optional, Union
+from typing import Any, Dict, Literal, Optional, Tuple, Union
 
 
 class ValidationError(TypeError):
@@ -18,12 +18,17 @@ def Field(
     # numbers
     min: Optional[Union[int, float]] = None,
     max: Optional[Union[int, float]] = None,
+    # bytes & json collections
+    compress: Optional[Literal["zlib", "lzma"]] = None,  # codec of large payloads
+    compress_above: Optional[int] = None,  # only compress beyond this many bytes
 ) -> Any:
     return _FieldInfo(
         default=default,
         docs=docs,
         min=min,
         max=max,
+        compress=compress,
+        compress_above=compress_above,
     )
 
 
@@ -33,6 +38,8 @@ class _FieldInfo:
     docs: Optional[str]
     min: Optional[Union[int, float]]
     max: Optional[Union[int, float]]
+    compress: Optional[Literal["zlib", "lzma"]] = None
+    compress_above: Optional[int] = None
     pass
 
 
@@ -63,3 +70,29 @@ class OutputPathOnHDFS(AzurePath):
     _PATH_IO = "output"
     _PATH_DATASTORE_MODE = "hdfs"
     pass
+
+
+class NDArray:
+    """Dense `numpy.ndarray` argument, e.g. `NDArray["float32", (None, 128)]`
+    for any number of 128-wide float32 rows. Declared dtypes and dimensions are
+    checked, `None` matches any size. Values are encoded from the raw buffer
+    and decoded as read-only arrays over it. Requires `numpy` when used."""
+
+    _DTYPE: Optional[str] = None
+    _SHAPE: Optional[Tuple[Optional[int], ...]] = None
+    _VARIANTS: Dict[Tuple[Any, Any], type] = {}
+
+    def __class_getitem__(cls, params: Any) -> type:
+        dtype, shape = params if isinstance(params, tuple) else (params, None)
+        shape = None if shape is None else tuple(shape)
+        key = (dtype, shape)
+        if key not in NDArray._VARIANTS:
+            name = f"NDArray[{dtype!r}, {shape!r}]"
+            NDArray._VARIANTS[key] = type(
+                name,
+                (NDArray,),
+                {"_DTYPE": dtype, "_SHAPE": shape, "__qualname__": name},
+            )
+        return NDArray._VARIANTS[key]
+
+    pass
@@ -1,14 +1,24 @@
 import base64
+import collections
+import collections.abc
+import copy
 import dataclasses
 import datetime
 import enum
 import json
+import lzma
+import math
 import pathlib
+import re
+import threading
 import unittest
+import zlib
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
+    Iterator,
     List,
     Literal,
     Optional,
@@ -20,11 +30,12 @@ from typing import (
 )
 
 import pydantic
+import pydantic_core
 
-from .defs import AzurePath, Field, ValidationError, _FieldInfo
+from .defs import AzurePath, Field, NDArray, ValidationError, _FieldInfo
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class ParseDraft:
     fn_load_yaml: Callable[[Any], Any]
     fn_load_cli: Callable[[str], Any]
@@ -37,7 +48,7 @@ class ParseDraft:
     pass
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ParsedInputField:
     name: str
     docs: Optional[str]
@@ -46,6 +57,8 @@ class ParsedInputField:
     aml_optional: bool
     aml_default: Any
     draft: ParseDraft
+    # fresh copy of a default for every call; `identity` if values are immutable
+    fn_copy_default: Callable[[Any], Any]
 
     def is_input_field(self) -> bool:
         if isinstance(self.py_type, type) and issubclass(self.py_type, AzurePath):
@@ -76,12 +89,15 @@ def parse_input_field(name: str, typ: Any, field: _FieldInfo) -> ParsedInputFiel
         draft = _parse_draft(name, typ.__args__[0], field)
         _old_fn_load_yaml = draft.fn_load_yaml
         _old_fn_load_cli = draft.fn_load_cli
-        draft.fn_load_yaml = lambda s: None if s is None else _old_fn_load_yaml(s)
-        draft.fn_load_cli = lambda s: None if s == "" else _old_fn_load_cli(s)
         _old_fn_dump_yaml = draft.fn_dump_yaml
         _old_fn_dump_cli = draft.fn_dump_cli
-        draft.fn_dump_yaml = lambda x: None if x is None else _old_fn_dump_yaml(x)
-        draft.fn_dump_cli = lambda x: "" if x is None else _old_fn_dump_cli(x)
+        draft = dataclasses.replace(
+            draft,
+            fn_load_yaml=lambda s: None if s is None else _old_fn_load_yaml(s),
+            fn_load_cli=lambda s: None if s == "" else _old_fn_load_cli(s),
+            fn_dump_yaml=lambda x: None if x is None else _old_fn_dump_yaml(x),
+            fn_dump_cli=lambda x: "" if x is None else _old_fn_dump_cli(x),
+        )
         aml_optional = True
     else:
         draft = _parse_draft(name, typ, field)
@@ -96,9 +112,64 @@ def parse_input_field(name: str, typ: Any, field: _FieldInfo) -> ParsedInputFiel
         aml_optional=aml_optional,
         aml_default=aml_default,
         draft=draft,
+        fn_copy_default=_default_copier(typ),
     )
 
 
+def _default_copier(typ: Any, _seen: Tuple[Any, ...] = ()) -> Callable[[Any], Any]:
+    """Cheapest way to copy values of `typ` so that calls never share mutable
+    defaults: immutable values are shared as-is, containers are rebuilt and
+    anything else is deep-copied."""
+
+    if typ in {int, float, bool, str, bytes, type(None), datetime.datetime}:
+        return identity
+    if isinstance(typ, type) and issubclass(typ, enum.Enum):
+        return identity
+
+    origin = getattr(typ, "__origin__", None)
+    args = getattr(typ, "__args__", ())
+    if origin is Literal:
+        return identity
+    elif origin is Union or origin is Optional:
+        copiers = [_default_copier(t, _seen) for t in args]
+        if all(c is identity for c in copiers):
+            return identity
+        if shadow_typ := _is_optional(typ):
+            inner = _default_copier(shadow_typ, _seen)
+            return lambda x: None if x is None else inner(x)
+    elif origin is list or origin is List:
+        item = _default_copier(args[0], _seen)
+        if item is identity:
+            return list
+        return lambda x: [item(v) for v in x]
+    elif origin is set or origin is Set:
+        return set  # items are hashable, hence not mutated in place
+    elif origin is dict or origin is Dict:
+        value = _default_copier(args[1], _seen)
+        if value is identity:
+            return dict
+        return lambda x: {k: value(v) for k, v in x.items()}
+    elif (origin is tuple or origin is Tuple) and args[-1:] == (...,):
+        item = _default_copier(args[0], _seen)
+        if item is identity:
+            return identity
+        return lambda x: tuple(item(v) for v in x)
+    elif origin is tuple or origin is Tuple:
+        copiers = [_default_copier(t, _seen) for t in args]
+        if all(c is identity for c in copiers):
+            return identity
+        return lambda x: tuple(c(v) for c, v in zip(copiers, x))
+    elif isinstance(typ, type) and issubclass(typ, pydantic.BaseModel):
+        if typ in _seen:  # recursive models are decided by their other fields
+            return identity
+        if typ.model_config.get("frozen") and all(
+            _default_copier(field.annotation, (*_seen, typ)) is identity
+            for field in typ.model_fields.values()
+        ):
+            return identity
+    return copy.deepcopy
+
+
 def _is_optional(typ: Any) -> Optional[type]:
     origin = getattr(typ, "__origin__", None)
     if origin is Optional:
@@ -116,6 +187,11 @@ def _is_optional(typ: Any) -> Optional[type]:
 
 
 def _parse_draft(name: str, typ: Any, field: _FieldInfo) -> ParseDraft:
+    scalar = typ in _SCALAR_TYPES or (
+        isinstance(typ, type) and issubclass(typ, (enum.Enum, AzurePath))
+    )
+    if scalar and (field.compress or field.compress_above is not None):
+        raise ValidationError(f"Field `{name}` of type `{typ}` cannot be compressed")
     if typ is int:
         return ParseDraft(
             fn_load_yaml=identity,
@@ -167,11 +243,12 @@ def _parse_draft(name: str, typ: Any, field: _FieldInfo) -> ParseDraft:
             aml_type="string",
         )
     elif typ is bytes:
+        dump_b = lambda x: _compress(field, cast(bytes, x))  # noqa: E731
         return ParseDraft(
-            fn_load_yaml=lambda s: base64.b64decode(s.encode()),
-            fn_load_cli=lambda s: base64.b64decode(s.encode()),
-            fn_dump_yaml=lambda s: base64.b64encode(cast(bytes, s)).decode(),
-            fn_dump_cli=lambda s: base64.b64encode(cast(bytes, s)).decode(),
+            fn_load_yaml=_decompress,
+            fn_load_cli=_decompress,
+            fn_dump_yaml=dump_b,
+            fn_dump_cli=dump_b,
             fn_post_validate=lambda _: None,
             aml_type="string",
         )
@@ -203,6 +280,22 @@ def _parse_draft(name: str, typ: Any, field: _FieldInfo) -> ParseDraft:
             aml_type="string",
         )
 
+    elif isinstance(typ, type) and issubclass(typ, NDArray):
+        if typ._DTYPE is not None and (err := _check_dtype(typ._DTYPE)):
+            raise ValidationError(f"Field `{name}` has invalid type:\n  {err}")
+        load_a = lambda s: _load_ndarray(s)  # noqa: E731
+        dump_a = lambda x: _dump_ndarray(field, x)  # noqa: E731
+        return ParseDraft(
+            fn_load_yaml=load_a,
+            fn_load_cli=load_a,
+            fn_dump_yaml=dump_a,
+            fn_dump_cli=dump_a,
+            fn_post_validate=lambda x: _check_ndarray(typ, x),
+            aml_type="string",
+        )
+    elif getattr(typ, "__origin__", None) is collections.abc.Iterable:
+        return _parse_iterable_draft(name, typ.__args__[0], field)
+
     # fallback process
     errs: List[str] = []
     _validate_serialize(typ, ["root"], errs)
@@ -210,13 +303,151 @@ def _parse_draft(name: str, typ: Any, field: _FieldInfo) -> ParseDraft:
         log = f"Field `{name}` has invalid type:\n"
         log += "\n".join(f"  {err}" for err in errs)
         raise ValidationError(log)
-    Model = pydantic.create_model(f"parser[{name}]", value=(typ, ...))
-    load_s = lambda s: Model(value=json.loads(s)).value  # type: ignore # noqa: E731
-    dump_x = lambda x: json.dumps(  # noqa: E731
-        json.loads(Model(value=x).model_dump_json())["value"],
-        indent=None,
-        ensure_ascii=True,
+    adapter = TypeAdapters.get(typ)
+    load_s = lambda s: adapter.validate_python(  # noqa: E731
+        json.loads(_decompress(s) if s.startswith("~") else s)
+    )
+    if field.compress is None and field.compress_above is None:
+        dump_x = lambda x: _dump_json(adapter, x)  # noqa: E731
+    else:
+        dump_x = lambda x: _compress(  # noqa: E731
+            field, _dump_json(adapter, x).encode(), plain=bytes.decode
+        )
+    return ParseDraft(
+        fn_load_yaml=load_s,
+        fn_load_cli=load_s,
+        fn_dump_yaml=dump_x,
+        fn_dump_cli=dump_x,
+        fn_post_validate=lambda _: None,
+        aml_type="string",  # we using json
     )
+
+
+_SCALAR_TYPES = {int, float, bool, str, datetime.datetime, type(None)}
+
+# tagged payloads, never valid base64 or json: `~<codec>:<base64>`
+_CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda b: zlib.compress(b, 9), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def _compress(
+    field: _FieldInfo,
+    data: bytes,
+    plain: Callable[[bytes], str] = lambda b: base64.b64encode(b).decode(),
+) -> Any:
+    """Encode `data` with the codec of the field if it is beyond the field's size
+    threshold and the tagged payload turns out smaller, or as `plain(data)`."""
+
+    if field.compress is None and field.compress_above is None:
+        return plain(data)
+    if field.compress_above is not None and len(data) <= field.compress_above:
+        return plain(data)
+    codec = field.compress or "zlib"
+    compressed = f"~{codec}:{base64.b64encode(_CODECS[codec][0](data)).decode()}"
+    uncompressed = plain(data)
+    return compressed if len(compressed) < len(uncompressed) else uncompressed
+
+
+def _decompress(s: str) -> bytes:
+    """Inverse of `_compress`, accepting plain base64 as well."""
+
+    if not s.startswith("~"):
+        return base64.b64decode(s.encode())
+    codec, payload = s[1:].split(":", 1)
+    if codec not in _CODECS:
+        raise ValueError(f"unknown payload codec `{codec}`")
+    return _CODECS[codec][1](base64.b64decode(payload.encode()))
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as err:
+        raise ImportError("NDArray fields require `numpy` to be installed") from err
+    return numpy
+
+
+def _dump_ndarray(field: _FieldInfo, x: Any) -> str:
+    """`<dtype>:<shape>:<base64 of the C-ordered buffer>`, e.g. `<f4:2,3:...`;
+    the dtype string carries the byte order, so payloads are portable."""
+
+    numpy = _import_numpy()
+    x = numpy.asarray(x, order="C")
+    shape = ",".join(str(n) for n in x.shape)
+    data = x.reshape(-1).view(numpy.uint8).data  # no copy of the buffer
+    return f"{x.dtype.str}:{shape}:{_compress(field, data)}"
+
+
+def _load_ndarray(s: str) -> Any:
+    numpy = _import_numpy()
+    dtype, shape, payload = s.split(":", 2)
+    dims = tuple(int(n) for n in shape.split(",")) if shape else ()
+    return numpy.frombuffer(_decompress(payload), dtype=dtype).reshape(dims)
+
+
+def _check_dtype(dtype: Any) -> Optional[str]:
+    """Only dtypes that `dtype.str` fully describes survive the raw buffer
+    encoding: not python objects, nor structured or void records, whose field
+    layout would be lost. Declared dtype strings are checked without numpy."""
+
+    if isinstance(dtype, str):
+        spec = dtype.lstrip("|<>=")
+        if spec == "object" or spec.startswith("O"):
+            kind = "O"
+        elif spec == "void" or spec.startswith("V") or "," in spec:
+            kind = "V"
+        else:
+            return None
+    elif isinstance(dtype, (list, tuple, dict)):
+        kind = "V"  # field specs
+    else:
+        kind = getattr(dtype, "kind", None)
+    if kind == "O":
+        return "arrays of python objects are not supported"
+    if kind == "V":
+        return f"structured and void dtypes are not supported, got {dtype}"
+    return None
+
+
+def _check_ndarray(typ: Any, x: Any) -> Optional[str]:
+    numpy = _import_numpy()
+    if not isinstance(x, numpy.ndarray):
+        return f"expected numpy.ndarray, got {type(x).__name__}"
+    if err := _check_dtype(x.dtype):
+        return err
+    if typ._DTYPE is not None and x.dtype != numpy.dtype(typ._DTYPE):
+        return f"expected dtype {typ._DTYPE}, got {x.dtype}"
+    if typ._SHAPE is not None and (
+        len(x.shape) != len(typ._SHAPE)
+        or any(n is not None and n != m for n, m in zip(typ._SHAPE, x.shape))
+    ):
+        return f"expected shape {typ._SHAPE}, got {x.shape}"
+    return None
+
+
+def _parse_iterable_draft(name: str, item_typ: Any, field: _FieldInfo) -> ParseDraft:
+    """`Iterable[T]` is encoded like `List[T]`, but loads into a generator that
+    decodes and validates one element at a time, so that functions can start on
+    huge collections right away and only hold one item besides the raw text."""
+
+    errs: List[str] = []
+    _validate_serialize(item_typ, ["root", "i"], errs)
+    if errs:
+        log = f"Field `{name}` has invalid type:\n"
+        log += "\n".join(f"  {err}" for err in errs)
+        raise ValidationError(log)
+    adapter = TypeAdapters.get(item_typ)
+
+    def load_s(s: str) -> Iterator[Any]:
+        text = _decompress(s).decode() if s.startswith("~") else s
+        return map(adapter.validate_python, _iter_json_array(text))
+
+    def dump_x(x: Iterable[Any]) -> str:
+        text = "[" + ", ".join(_dump_json(adapter, v) for v in x) + "]"
+        return _compress(field, text.encode(), plain=bytes.decode)
+
     return ParseDraft(
         fn_load_yaml=load_s,
         fn_load_cli=load_s,
@@ -227,40 +458,176 @@ def _parse_draft(name: str, typ: Any, field: _FieldInfo) -> ParseDraft:
     )
 
 
+_JSON_WS = re.compile(r"[ \t\n\r]*")
+
+
+def _iter_json_array(s: str) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    idx = _JSON_WS.match(s).end()  # type: ignore
+    if s[idx : idx + 1] != "[":
+        raise ValueError(f"expected a json array at char {idx}")
+    idx = _JSON_WS.match(s, idx + 1).end()  # type: ignore
+    if s[idx : idx + 1] == "]":
+        idx += 1
+    else:
+        while True:
+            value, idx = decoder.raw_decode(s, idx)
+            yield value
+            idx = _JSON_WS.match(s, idx).end()  # type: ignore
+            sep = s[idx : idx + 1]
+            idx = _JSON_WS.match(s, idx + 1).end()  # type: ignore
+            if sep == "]":
+                break
+            if sep != ",":
+                raise ValueError(f"expected ',' or ']' at char {idx}")
+    if _JSON_WS.match(s, idx).end() != len(s):  # type: ignore
+        raise ValueError(f"extra data at char {idx}")
+    return
+
+
+def _dump_json(adapter: "pydantic.TypeAdapter[Any]", x: Any) -> str:
+    """Canonical json of `x`: `json.dumps` spacing with ascii escapes, encoded
+    straight from the json-compatible values of pydantic-core. Values are
+    validated first, so that anything that would not load is rejected here."""
+
+    obj = adapter.dump_python(adapter.validate_python(x), mode="json")
+    return json.dumps(obj, ensure_ascii=True)
+
+
+class TypeAdapterRegistry:
+    """Process-wide pydantic adapters keyed on the annotation, so that fields of
+    the same complex type share one compiled validator and serializer. The
+    least recently used adapters are dropped beyond `max_size`."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._adapters: collections.OrderedDict[Any, pydantic.TypeAdapter[Any]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, typ: Any) -> "pydantic.TypeAdapter[Any]":
+        try:
+            hash(typ)
+        except TypeError:  # e.g. Annotated metadata that cannot be hashed
+            with self._lock:
+                self.misses += 1
+            return pydantic.TypeAdapter(typ)
+        with self._lock:
+            adapter = self._adapters.get(typ)
+            if adapter is not None:
+                self.hits += 1
+                self._adapters.move_to_end(typ)
+                return adapter
+            self.misses += 1
+        adapter = pydantic.TypeAdapter(typ)
+        with self._lock:
+            self._adapters[typ] = adapter
+            while len(self._adapters) > self.max_size:
+                self._adapters.popitem(last=False)
+                self.evictions += 1
+        return adapter
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._adapters),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._adapters.clear()
+        return
+
+    pass
+
+
+TypeAdapters = TypeAdapterRegistry()
+
+
+# (message, path relative to the type) of every unserializable part of a type
+_TypeErrors = List[Tuple[str, Tuple[str, ...]]]
+_SerializeVerdicts: Dict[Any, _TypeErrors] = {}
+
+
 def _validate_serialize(typ: Any, path: List[str], errs: List[str]) -> None:
+    for message, suffix in _serialize_errors(typ, {})[0]:
+        errs.append(f"{message} at: {'.'.join(path + list(suffix))}")
+    return
+
+
+def _serialize_errors(typ: Any, stack: Dict[Any, int]) -> Tuple[_TypeErrors, float]:
+    """Errors of `typ`, and the lowest depth in `stack` that they depend on
+    through a cycle. Recursive types are valid as long as everything else they
+    contain is, and verdicts are cached per type once their cycle is closed."""
+
     if typ in {int, float, bool, str, type(None)}:
-        return
+        return [], math.inf
     elif typ in {datetime.datetime}:
-        return
+        return [], math.inf
+    try:
+        hash(typ)
+    except TypeError:
+        return _serialize_errors_uncached(typ, stack)
+    if typ in _SerializeVerdicts:
+        return _SerializeVerdicts[typ], math.inf
+    if typ in stack:
+        return [], stack[typ]
+
+    depth = stack[typ] = len(stack)
+    errs, low = _serialize_errors_uncached(typ, stack)
+    del stack[typ]
+    if low >= depth:  # nothing below depends on types still being checked
+        _SerializeVerdicts[typ] = errs
+        low = math.inf
+    return errs, low
+
+
+def _serialize_errors_uncached(
+    typ: Any, stack: Dict[Any, int]
+) -> Tuple[_TypeErrors, float]:
+    errs: _TypeErrors = []
+    low = math.inf
+
+    def visit(t: Any, key: str) -> None:
+        nonlocal low
+        sub_errs, sub_low = _serialize_errors(t, stack)
+        errs.extend((message, (key, *suffix)) for message, suffix in sub_errs)
+        low = min(low, sub_low)
 
     origin = getattr(typ, "__origin__", None)
     if origin is list or origin is List:
-        _validate_serialize(typ.__args__[0], path + ["i"], errs)
+        visit(typ.__args__[0], "i")
     elif origin is tuple or origin is Tuple:
         for i, t in enumerate(typ.__args__):
-            _validate_serialize(t, path + [f"{i}"], errs)
+            visit(t, f"{i}")
     elif origin is dict or origin is Dict:
-        _validate_serialize(typ.__args__[0], path + ["key"], errs)
-        _validate_serialize(typ.__args__[1], path + ["value"], errs)
+        visit(typ.__args__[0], "key")
+        visit(typ.__args__[1], "value")
     elif origin is set or origin is Set:
-        _validate_serialize(typ.__args__[0], path + ["i"], errs)
+        visit(typ.__args__[0], "i")
     elif origin is Union:
         for i, t in enumerate(typ.__args__):
-            _validate_serialize(t, path + [f"{i}"], errs)
+            visit(t, f"{i}")
     elif origin is Optional:
-        _validate_serialize(typ.__args__[0], path + ["t"], errs)
+        visit(typ.__args__[0], "t")
     elif origin is Literal:
         pass
     elif isinstance(typ, type) and issubclass(typ, pydantic.BaseModel):
         for name, field in typ.model_fields.items():
-            _validate_serialize(field.annotation, path + [name], errs)
+            visit(field.annotation, name)
     elif isinstance(typ, type) and issubclass(typ, enum.Enum):
         for name, member in typ.__members__.items():
             if not isinstance(member.value, (int, str)):
-                errs.append(f"invalid enum value `{name}` at: {'.'.join(path)}")
+                errs.append((f"invalid enum value `{name}`", ()))
     else:
-        errs.append(f"invalid type `{typ}` at: {'.'.join(path)}")
-    return
+        errs.append((f"invalid type `{typ}`", ()))
+    return errs, low
 
 
 class TypeCheckFmtTests(unittest.TestCase):
@@ -304,4 +671,278 @@ class TypeCheckFmtTests(unittest.TestCase):
         sample_1 = [Item(name="a", value=Option.A), Item(name="b", value=Option.B)]
         self.check(f_my_test, [], sample_1)
 
+    def test_dump_json(self) -> None:
+        class Option(enum.Enum):
+            A = 1
+            B = 2
+
+        class Item(pydantic.BaseModel):
+            name: str
+            value: Option
+            when: datetime.datetime
+            tags: Dict[str, List[float]]
+
+        def legacy_dump(adapter: "pydantic.TypeAdapter[Any]", x: Any) -> str:
+            return json.dumps(
+                json.loads(adapter.dump_json(adapter.validate_python(x))),
+                indent=None,
+                ensure_ascii=True,
+            )
+
+        when = datetime.datetime(2020, 1, 1, 12, 30)
+        items = [
+            Item(name=f"ñ{i}", value=Option.B, when=when, tags={"a": [i / 3, 1e20]})
+            for i in range(3)
+        ]
+        cases: List[Tuple[Any, List[Any]]] = [
+            (List[Item], [[], items[:3], [item.model_dump() for item in items[:3]]]),
+            (Dict[str, Tuple[int, str]], [{}, {"ü": (1, "\n")}]),
+            (Set[Literal["x", "y"]], [{"x"}]),
+            (List[List[bool]], [[[True], []]]),
+        ]
+        for typ, values in cases:
+            field = parse_input_field("f", typ, Field(...))
+            adapter = TypeAdapters.get(typ)
+            for value in values:
+                dumped = field.draft.fn_dump_yaml(value)
+                self.assertEqual(dumped, legacy_dump(adapter, value))
+                self.assertEqual(
+                    field.draft.fn_dump_yaml(field.draft.fn_load_yaml(dumped)), dumped
+                )
+
+        # values that serialize but do not validate are still rejected
+        invalid: List[Tuple[Any, Any]] = [
+            (Literal["a", "b"], "bogus"),
+            (List[Literal["x", "y"]], ["z"]),
+            (List[Item], [{"name": "a"}]),
+        ]
+        for typ, value in invalid:
+            field = parse_input_field("f", typ, Field(...))
+            with self.assertRaises(pydantic.ValidationError):
+                field.draft.fn_dump_yaml(value)
+
+    def test_compressed_codec(self) -> None:
+        import time
+
+        class Row(pydantic.BaseModel):
+            key: str
+            weights: List[float]
+
+        table = [Row(key=f"k{i % 97}", weights=[0.5, i % 7]) for i in range(5000)]
+        blob = bytes(range(256)) * 4096
+        cases: List[Tuple[Any, Any, Dict[str, Any]]] = [
+            (List[Row], table, {"compress": "zlib"}),
+            (List[Row], table, {"compress": "lzma"}),
+            (bytes, blob, {"compress": "zlib"}),
+            (bytes, blob, {"compress_above": 1 << 16}),
+        ]
+        report: List[str] = []
+        for typ, value, options in cases:
+            plain = parse_input_field("f", typ, Field(...))
+            packed = parse_input_field("f", typ, Field(..., **options))
+            begin = time.perf_counter()
+            dumped = packed.draft.fn_dump_yaml(value)
+            encoded = time.perf_counter() - begin
+            self.assertEqual(packed.draft.fn_load_cli(dumped), value)
+            decoded = time.perf_counter() - begin - encoded
+            # decoding is transparent, even for fields without compression
+            self.assertEqual(plain.draft.fn_load_yaml(dumped), value)
+            size = len(plain.draft.fn_dump_yaml(value))
+            report.append(
+                f"{typ} {options}: {size} -> {len(dumped)} bytes, "
+                f"encode {encoded:.4f}s, decode {decoded:.4f}s"
+            )
+            self.assertLess(len(dumped), size / 10, report[-1])
+
+        # small payloads stay plain
+        small = parse_input_field("f", Optional[bytes], Field(None, compress="lzma"))
+        self.assertEqual(small.draft.fn_dump_yaml(b"ab"), "YWI=")
+        self.assertIsNone(small.draft.fn_load_yaml(small.draft.fn_dump_yaml(None)))
+        above = parse_input_field("f", bytes, Field(b"", compress_above=1 << 30))
+        self.assertEqual(above.draft.fn_dump_cli(b"\0" * 1000)[:4], "AAAA")
+        with self.assertRaises(ValidationError):
+            parse_input_field("f", int, Field(0, compress="zlib"))
+
+    def test_iterable(self) -> None:
+        class Item(pydantic.BaseModel):
+            name: str
+            value: int
+
+        f_list = parse_input_field("f_list", List[Item], Field(...))
+        f_iter = parse_input_field("f_iter", Iterable[Item], Field(...))
+        items = [Item(name=f"n{i}", value=i) for i in range(100)]
+        dumped = f_iter.draft.fn_dump_yaml(iter(items))
+        self.assertEqual(dumped, f_list.draft.fn_dump_yaml(items))
+        loaded = f_iter.draft.fn_load_cli(dumped)
+        self.assertNotIsInstance(loaded, list)
+        self.assertEqual(list(loaded), items)
+        for empty in ["[]", " [ ] ", "[\n]"]:
+            self.assertEqual(list(f_iter.draft.fn_load_yaml(empty)), [])
+
+        # elements are validated lazily, errors only surface when reached
+        loaded = f_iter.draft.fn_load_yaml('[{"name": "a", "value": 1}, {"value": 2}]')
+        self.assertEqual(next(loaded), Item(name="a", value=1))
+        with self.assertRaises(pydantic.ValidationError):
+            next(loaded)
+        for bad in ["{}", "[1 2]", "[1,]", "[1] x"]:
+            with self.assertRaises(ValueError):
+                list(
+                    parse_input_field(
+                        "f", Iterable[int], Field(...)
+                    ).draft.fn_load_yaml(bad)
+                )
+
+        f_packed = parse_input_field("f", Iterable[Item], Field(..., compress="zlib"))
+        packed = f_packed.draft.fn_dump_cli(items)
+        self.assertTrue(packed.startswith("~zlib:"))
+        self.assertEqual(list(f_iter.draft.fn_load_cli(packed)), items)
+        with self.assertRaises(ValidationError):
+            parse_input_field("f", Iterable[complex], Field(...))
+
+    def test_ndarray(self) -> None:
+        # declaring the type does not need numpy
+        self.assertIs(NDArray["float32", (None, 3)], NDArray["float32", [None, 3]])
+        f_arr = parse_input_field("f_arr", NDArray["float32", (None, 3)], Field(...))
+        self.assertEqual(f_arr.draft.aml_type, "string")
+        # dtypes that raw buffers cannot describe are rejected up front
+        for dtype in ["|V12", "void", "i4,f4", "O"]:
+            with self.assertRaisesRegex(ValidationError, "are not supported"):
+                parse_input_field("f", NDArray[dtype], Field(...))
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+
+        x = numpy.arange(12, dtype=numpy.float32).reshape(4, 3)
+        dumped = f_arr.draft.fn_dump_yaml(x)
+        self.assertTrue(dumped.startswith("<f4:4,3:"))
+        loaded = f_arr.draft.fn_load_cli(dumped)
+        self.assertTrue(numpy.array_equal(loaded, x))
+        self.assertEqual(loaded.dtype, x.dtype)
+        self.assertFalse(loaded.flags.writeable)  # a view over the decoded buffer
+        self.assertIsNone(f_arr.draft.fn_post_validate(loaded))
+        # non-contiguous inputs are encoded in C order
+        self.assertTrue(
+            numpy.array_equal(
+                f_arr.draft.fn_load_yaml(f_arr.draft.fn_dump_yaml(x[::2])), x[::2]
+            )
+        )
+        for bad in [x.astype(numpy.float64), x.reshape(3, 4), x.reshape(12), [1.0]]:
+            self.assertIsNotNone(f_arr.draft.fn_post_validate(bad))
+
+        f_any = parse_input_field("f_any", NDArray, Field(...))
+        records = numpy.zeros(2, dtype=[("a", "<i4"), ("b", "<f8")])
+        for bad in [records, numpy.zeros(2, "V12"), numpy.array([None])]:
+            self.assertIn("not supported", f_any.draft.fn_post_validate(bad) or "")
+
+        f_any = parse_input_field(
+            "f_any", Optional[NDArray], Field(None, compress="zlib")
+        )
+        for value in [
+            numpy.zeros((64, 64)),
+            numpy.array(3 + 4j),
+            numpy.array([], "<i2"),
+        ]:
+            dumped = f_any.draft.fn_dump_yaml(value)
+            self.assertTrue(numpy.array_equal(f_any.draft.fn_load_yaml(dumped), value))
+        self.assertIn(":~zlib:", f_any.draft.fn_dump_cli(numpy.zeros((64, 64))))
+        self.assertIsNone(f_any.draft.fn_load_cli(f_any.draft.fn_dump_cli(None)))
+
+    def test_type_adapters(self) -> None:
+        class Item(pydantic.BaseModel):
+            name: str
+
+        registry = TypeAdapterRegistry(max_size=2)
+        adapter = registry.get(List[Item])
+        self.assertIs(registry.get(List[Item]), adapter)
+        registry.get(Dict[str, Item])
+        registry.get(List[Item])
+        registry.get(Tuple[int, Item])  # evicts Dict[str, Item]
+        self.assertIs(registry.get(List[Item]), adapter)
+        self.assertEqual(
+            registry.stats(), {"size": 2, "hits": 3, "misses": 3, "evictions": 1}
+        )
+
+        # fields of the same type share the process-wide adapter
+        before = TypeAdapters.stats()
+        f_a = parse_input_field("f_a", List[Item], Field([]))
+        f_b = parse_input_field("f_b", List[Item], Field([]))
+        self.assertEqual(TypeAdapters.stats()["hits"], before["hits"] + 1)
+        self.assertEqual(
+            f_b.draft.fn_load_yaml(f_a.draft.fn_dump_yaml([Item(name="a")])),
+            [Item(name="a")],
+        )
+
+    def test_validate_serialize(self) -> None:
+        class Tree(pydantic.BaseModel, frozen=True):
+            name: str
+            children: List["Tree"] = []
+
+        class Shared(pydantic.BaseModel):
+            ok: int
+            bad: complex
+
+        class Outer(pydantic.BaseModel):
+            first: Shared
+            rest: Dict[str, Tuple[Shared, bytes]]
+
+        class Loop(pydantic.BaseModel):
+            bad: Set[complex]
+            inner: Optional["Loop"] = None
+
+        errs: List[str] = []
+        _validate_serialize(Tree, ["root"], errs)
+        self.assertEqual(errs, [])
+        f_tree = parse_input_field("f_tree", Tree, Field(...))
+        self.check(f_tree, Tree(name="a", children=[Tree(name="b")]))
+
+        _validate_serialize(List[Outer], ["root"], errs)
+        self.assertEqual(
+            errs,
+            [
+                "invalid type `<class 'complex'>` at: root.i.first.bad",
+                "invalid type `<class 'complex'>` at: root.i.rest.value.0.bad",
+                "invalid type `<class 'bytes'>` at: root.i.rest.value.1",
+            ],
+        )
+        self.assertIn(Shared, _SerializeVerdicts)
+
+        # errors inside a cycle are reported once and cached with its root
+        errs.clear()
+        _validate_serialize(Loop, ["root"], errs)
+        _validate_serialize(Optional[Loop], ["root"], errs)
+        self.assertEqual(
+            errs,
+            [
+                "invalid type `<class 'complex'>` at: root.bad.i",
+                "invalid type `<class 'complex'>` at: root.0.bad.i",
+            ],
+        )
+
+    def test_default_copier(self) -> None:
+        class Option(enum.Enum):
+            A = 1
+
+        class Frozen(pydantic.BaseModel, frozen=True):
+            name: str
+
+        class Item(pydantic.BaseModel):
+            names: List[str]
+
+        for typ in [int, Optional[str], Option, Tuple[int, str], Frozen]:
+            self.assertIs(_default_copier(typ), identity)
+
+        nested = {"a": [Item(names=["x"])]}
+        copied = _default_copier(Dict[str, List[Item]])(nested)
+        self.assertEqual(copied, nested)
+        self.assertIsNot(copied["a"], nested["a"])
+        self.assertIsNot(copied["a"][0], nested["a"][0])
+        self.assertIsNot(copied["a"][0].names, nested["a"][0].names)
+        shallow = _default_copier(List[Tuple[int, ...]])([(1, 2)])
+        self.assertEqual(shallow, [(1, 2)])
+
+        f_list = parse_input_field("f_list", Optional[List[int]], Field([1]))
+        self.assertIsNone(f_list.fn_copy_default(None))
+        self.assertIsNot(f_list.fn_copy_default(f_list.py_default), f_list.py_default)
+
     pass
@@ -1,24 +1,61 @@
+import contextvars
 import dataclasses
-import inspect
+import sys
 import unittest
+import weakref
+from types import FrameType
 from typing import Generic, TypeVar
 
 T = TypeVar("T")
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class PyCtxPointer(Generic[T]):
     ancestors: list[T]
     current: tuple[T] | None
     pass
 
 
+class _PyCtxFrameToken:
+    """Lives in the locals of a frame that holds context values, and dies with
+    the frame. Entries keep a weak reference to it so that values set by
+    returned frames are dropped without walking the stack."""
+
+    __slots__ = ("__weakref__",)
+    pass
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _PyCtxEntry(Generic[T]):
+    frame_id: int
+    token: "weakref.ref[_PyCtxFrameToken]"
+    pointer: PyCtxPointer[T]
+    pass
+
+
 class PyCtx(Generic[T]):
+    """Frame-scoped context: a value appended in a frame is visible to the frame
+    itself and everything it calls, and disappears once the frame returns.
+
+    Entries are kept on a per-context table (`contextvars`) indexed by frame,
+    so lookups only walk from the caller up to the nearest frame that set a
+    value, instead of inspecting the whole stack. A lookup therefore costs one
+    dict probe per frame between the caller and that setter: it is linear in
+    that distance, but independent of how many entries are held, and
+    `frames_walked` counts the frames inspected so far. Threads and asyncio
+    tasks get their own tables."""
+
     def __init__(self, key: str):
         self._root_key = "__$__GENERIC_STORE__$__"
         self._key = key
+        self._entries: contextvars.ContextVar[dict[int, _PyCtxEntry[T]]] = (
+            contextvars.ContextVar(f"amari.utils.pyctx[{key}]", default={})
+        )
+        self.frames_walked = 0
 
     def get(self, offset: int = 0) -> list[T]:
+        if not self._entries.get():
+            return []
         ptr, _off = self.__load(2 + offset)
         ret = list(ptr.ancestors)
         if ptr.current is not None:
@@ -34,33 +71,57 @@ class PyCtx(Generic[T]):
         self.__store(2 + offset, new_ptr)
         return
 
+    def __prune(self) -> dict[int, _PyCtxEntry[T]]:
+        entries = self._entries.get()
+        if all(e.token() is not None for e in entries.values()):
+            return entries
+        live = {k: e for k, e in entries.items() if e.token() is not None}
+        self._entries.set(live)
+        return live
+
+    def __owns(self, frame: FrameType, entry: _PyCtxEntry[T]) -> bool:
+        # frame ids are addresses and get reused once a frame is freed, while
+        # its token may outlive it (e.g. through a returned `locals()`), so the
+        # frame must also still hold the entry's token
+        token = entry.token()
+        return token is not None and frame.f_locals.get(self._root_key) is token
+
     def __load(self, offset: int) -> tuple[PyCtxPointer[T], int]:
-        stk = inspect.stack()
-        pointer = PyCtxPointer[T](ancestors=[], current=None)
+        entries = self._entries.get()
+        if not entries:
+            return PyCtxPointer(ancestors=[], current=None), 0
+        frame: FrameType | None = sys._getframe(offset)
         res_offset = 0
-        # for frame in stk:
-        for i, frame in enumerate(stk[offset:]):
-            vars = frame.frame.f_locals
-            if self._root_key not in vars:
-                continue
-            root: dict[str, PyCtxPointer[T]] = vars[self._root_key]
-            if self._key not in root:
-                continue
-            pointer = root[self._key]
-            res_offset = i
-            break
-        return pointer, res_offset
+        while frame is not None:
+            entry = entries.get(id(frame))
+            if entry is not None and self.__owns(frame, entry):
+                self.frames_walked += res_offset + 1
+                return entry.pointer, res_offset
+            frame = frame.f_back
+            res_offset += 1
+        self.frames_walked += res_offset
+        # nothing matched: drop entries of returned frames
+        self.__prune()
+        return PyCtxPointer(ancestors=[], current=None), 0
 
     def __store(self, offset: int, ptr: PyCtxPointer[T]) -> None:
-        stk = inspect.stack()
-        if len(stk) < offset:
+        try:
+            frame = sys._getframe(offset)
+        except ValueError:
             return
-        frame = stk[offset].frame
         vars = frame.f_locals
         if self._root_key not in vars:
-            vars[self._root_key] = {}
-        root: dict[str, PyCtxPointer[T]] = vars[self._root_key]
-        root[self._key] = ptr
+            vars[self._root_key] = _PyCtxFrameToken()
+        token: _PyCtxFrameToken = vars[self._root_key]
+        frame_id = id(frame)
+        del frame, vars
+
+        # replaces any stale entry left under a reused frame id
+        entries = dict(self.__prune())
+        entries[frame_id] = _PyCtxEntry(
+            frame_id=frame_id, token=weakref.ref(token), pointer=ptr
+        )
+        self._entries.set(entries)
         return
 
     pass
@@ -140,4 +201,71 @@ class PyCtxTests(unittest.TestCase):
         asyncio.run(a())
         self.assertEqual(result, expected)
 
+    def test_flat_cost(self):
+        """Lookups right below the setter walk the same number of frames at any
+        stack depth."""
+
+        ctx = PyCtx[int]("test_flat_cost")
+
+        def measure(depth: int) -> int:
+            if depth > 0:
+                return measure(depth - 1)
+            ctx.append(0)
+            begin = ctx.frames_walked
+            for i in range(10):
+                ctx.append(i)
+                ctx.get()
+            return ctx.frames_walked - begin
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(limit + 2000)
+        try:
+            walked = {depth: measure(depth) for depth in [10, 1000]}
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(walked, {10: 20, 1000: 20})
+
+    def test_lookup_below_setter(self):
+        """A `get()` below the setter walks up to it: the walk grows with that
+        distance, but not with the number of entries held further up."""
+
+        ctx = PyCtx[int]("test_lookup_below_setter")
+
+        def setters(count: int, distance: int) -> int:
+            if count > 0:
+                ctx.append(count)
+                return setters(count - 1, distance)
+            return below(distance)
+
+        def below(distance: int) -> int:
+            if distance > 0:
+                return below(distance - 1)
+            begin = ctx.frames_walked
+            ctx.get()
+            return ctx.frames_walked - begin
+
+        walked = {
+            (count, distance): setters(count, distance)
+            for count in [1, 64]
+            for distance in [10, 100]
+        }
+        # `below` frames, then `setters(0)`, then the setter
+        self.assertEqual(
+            walked, {(1, 10): 13, (1, 100): 103, (64, 10): 13, (64, 100): 103}
+        )
+
+    def test_reused_frame_id(self):
+        ctx = PyCtx[str]("test_reused_frame_id")
+
+        def f() -> dict:
+            ctx.append("X")
+            return locals()  # keeps the token alive past the frame
+
+        def g() -> list[str]:
+            return ctx.get()
+
+        keep = f()
+        self.assertEqual([g() for _ in range(200)], [[]] * 200)
+        del keep
+
     pass